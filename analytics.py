@@ -1,81 +1,72 @@
 # analytics.py
 import datetime
 import matplotlib.pyplot as plt
-from progress_db import ProgressDB
+from progress_db import ProgressDB, DEFAULT_USER
 import os
 import numpy as np
 import statistics
 
 class WellnessAnalytics:
-    def __init__(self):
+    def __init__(self, user_id=DEFAULT_USER):
+        self.user_id = user_id
         self.db = ProgressDB()
 
-    def _normalize_dates_scores(self, rows):
+    def _normalize_dates_scores(self, rows, days=30):
         """
-        Support MULTIPLE scores per day.
-        If a day has multiple entries → average the scores.
+        Spread the daily rollup rows (date, average score, last dosha) over
+        the last `days` days, oldest → newest; untracked days are None.
         """
-        # Build a dict: date → list of (dosha, score)
-        dmap = {}
-        for date, dosha, score in rows:
-            dmap.setdefault(date, []).append((dosha, score))
+        dmap = {date: (score, dosha) for date, score, dosha in rows}
 
         today = datetime.date.today()
         dates = []
         scores = []
         doshas = []
 
-        # Build last 30 days (oldest → newest)
-        for i in range(29, -1, -1):
-            day = today - datetime.timedelta(days=i)
-            day_s = str(day)
+        for i in range(days - 1, -1, -1):
+            day_s = str(today - datetime.timedelta(days=i))
             dates.append(day_s)
-
-            if day_s in dmap:
-                score_list = [s for _, s in dmap[day_s]]
-                avg_score = sum(score_list) / len(score_list)
-
-                most_recent_dosha = dmap[day_s][-1][0]
-
-                scores.append(avg_score)
-                doshas.append(most_recent_dosha)
-            else:
-                scores.append(None)
-                doshas.append(None)
+            score, dosha = dmap.get(day_s, (None, None))
+            scores.append(score)
+            doshas.append(dosha)
 
         return dates, scores, doshas
 
-    def generate_progress_graph(self, out_path="progress.png"):
-        rows = self.db.get_last_30_days()
+    def generate_progress_graph(self, out_path="progress.png", days=30):
+        rows = self.db.get_daily_scores(self.user_id, days)
         if not rows:
             print("❌ No progress data yet. Do a routine first.")
             return None
 
-        dates, scores, doshas = self._normalize_dates_scores(rows)
+        dates, scores, doshas = self._normalize_dates_scores(rows, days)
 
         y = [(np.nan if s is None else s) for s in scores]
 
         plt.figure(figsize=(10,4.5))
         plt.plot(dates, y, marker='o', linewidth=2, label="Sattva Score")
         plt.ylim(-5, 110)
-        plt.title("30-Day Wellness Progress — Sattva Score")
+        plt.title(f"{days}-Day Wellness Progress — Sattva Score")
         plt.xlabel("Date")
         plt.ylabel("Score")
         plt.grid(axis='y', linestyle='--', alpha=0.6)
-        plt.xticks(rotation=45, ha='right')
+        # Long ranges: label about 30 dates; archived months show as one monthly point
+        step = max(1, len(dates) // 30)
+        plt.xticks(range(0, len(dates), step), dates[::step], rotation=45, ha='right')
         plt.tight_layout()
 
-        plt.savefig(out_path)
+        # out_path may also be a file object (e.g. io.BytesIO for an HTTP response)
+        plt.savefig(out_path, format="png")
         plt.close()
-        print(f"📈 Progress graph saved to {out_path}")
+        if isinstance(out_path, str):
+            print(f"📈 Progress graph saved to {out_path}")
         return out_path
 
-    def generate_insights(self):
-        rows = self.db.get_last_30_days()
+    def generate_insights(self, days=30):
+        rows = self.db.get_daily_scores(self.user_id, days)
         if not rows:
             return "No data yet — start tracking daily to get insights."
 
-        _, scores_raw, doshas_raw = self._normalize_dates_scores(rows)
+        _, scores_raw, doshas_raw = self._normalize_dates_scores(rows, days)
 
         paired = [(d, s) for d, s in zip(doshas_raw, scores_raw) if s is not None]
         if not paired:
@@ -106,6 +97,13 @@ class WellnessAnalytics:
             else:
                 insight_lines.append("🔄 Routine varies a lot — try for consistency.")
 
+        if days > 30 and len(scores) >= 4:
+            half = len(scores) // 2
+            older, recent = statistics.mean(scores[:half]), statistics.mean(scores[half:])
+            trend = "up" if recent > older + 2 else "down" if recent < older - 2 else "steady"
+            insight_lines.append(f"📅 {days}-day average {statistics.mean(scores):.0f} — trend {trend} "
+                                 f"({older:.0f} → {recent:.0f}).")
+
         if not insight_lines:
             return "✨ No strong signals. Keep tracking for richer insights."
 
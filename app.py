@@ -69,17 +69,27 @@ def main():
     if start_choice == "1":
         typing_effect("\n📝 Analyzing Bio-Constitution...")
 
-        profile = {
-            'digestion': input("   Digestion (fast/slow/moderate): ").strip().lower(),
-            'sleep': input("   Sleep (light/deep/moderate): ").strip().lower(),
-            'energy': input("   Energy (low/high/moderate): ").strip().lower(),
-            'temperature_preference': input("   Temp Pref (cold/warm/moderate): ").strip().lower(),
-            'mood': input("   Mood (anxious/calm/irritable): ").strip().lower(),
-            'body_frame': input("   Body Frame (slim/broad/medium): ").strip().lower()
+        prompts = {
+            'digestion': "Digestion",
+            'sleep': "Sleep",
+            'energy': "Energy",
+            'temperature_preference': "Temp Pref",
+            'mood': "Mood",
+            'body_frame': "Body Frame"
         }
 
+        # Adaptive quiz: stop as soon as more answers can't change the result
+        profile = {}
+        while True:
+            step = ai_brain.next_question(profile)
+            if "error" in step or step["done"]:
+                break
+            key = step["question"]
+            options = "/".join(step["options"])
+            profile[key] = input(f"   {prompts.get(key, key)} ({options}): ").strip().lower()
+
         print("\n🧠 Processing...")
-        result = ai_brain.predict(profile)
+        result = step.get("result", step)
 
         if isinstance(result, dict) and "error" in result:
             print(f"❌ Error: {result['error']}")
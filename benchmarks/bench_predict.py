@@ -0,0 +1,60 @@
+"""
+Per-call latency of DietVedaAI.predict (precomputed table) against
+predict_forest (encode + DataFrame + forest walk on every call), with the
+compiled NumPy forest and with the pickled sklearn forest; then predict_batch
+throughput in rows/sec from 1 to 100k profiles (1% invalid rows) against a
+predict() loop over the same profiles.
+
+    python benchmarks/bench_predict.py
+"""
+import os
+import sys
+import copy
+import time
+import random
+
+import joblib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from predictor import DietVedaAI, MODEL_FILE
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    os.chdir(ROOT)
+    start = time.perf_counter()
+    brain = DietVedaAI()
+    print(f"model load (incl. table build): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    profile = {f: next(iter(brain._codes[f])) for f in brain.features}
+    lookup = per_call_us(lambda: brain.predict(profile), 100_000)
+    forest = per_call_us(lambda: brain.predict_forest(profile), 200)
+    print(f"predict (table):  {lookup:10.1f} us/call")
+    print(f"predict_forest:   {forest:10.1f} us/call   ({forest / lookup:,.0f}x)  [{type(brain.model).__name__}]")
+    if os.path.exists(MODEL_FILE):
+        sklearn_brain = copy.copy(brain)
+        sklearn_brain.model = joblib.load(MODEL_FILE)
+        forest = per_call_us(lambda: sklearn_brain.predict_forest(profile), 100)
+        print(f"predict_forest:   {forest:10.1f} us/call   ({forest / lookup:,.0f}x)  [sklearn]")
+
+    rng = random.Random(0)
+    options = {f: list(brain._codes[f]) for f in brain.features}
+    for n in (1, 10, 100, 1_000, 10_000, 100_000):
+        profiles = [{f: rng.choice(values) for f, values in options.items()} for _ in range(n)]
+        for i in range(0, n, 100):
+            profiles[i] = dict(profiles[i], **{brain.features[0]: "not-an-option"})
+        repeat = max(1, 10_000 // n)
+        batch = per_call_us(lambda: brain.predict_batch(profiles), repeat) / n
+        loop = per_call_us(lambda: [brain.predict(p) for p in profiles], repeat) / n
+        print(f"predict_batch {n:>7,} rows: {1e6 / batch:12,.0f} rows/s   predict loop {1e6 / loop:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Concurrent progress writes/reads: the original connect-per-call ProgressDB vs
+the pooled WAL connections (one commit per save) vs today's ProgressDB (pooled,
+saves group-committed by the write-behind writer), on 1 / 4 / 16 threads.
+Each thread does 500 operations, 80% save_score and 20% get_last_30_days,
+through a fresh object per operation as the Flask routes do. Reads are of
+another user's history, so the write-behind reads don't wait for the thread's
+own queued saves (read-your-writes costs up to one flush interval).
+
+    python benchmarks/bench_progress_db.py
+"""
+import os
+import sys
+import time
+import sqlite3
+import datetime
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import progress_db
+from progress_db import ProgressDB, get_pool, insert_rows, day_to_int
+
+OPS_PER_THREAD = 500
+
+
+class LegacyProgressDB:
+    """progress_db.ProgressDB as it was: a new connection and CREATE TABLE per object."""
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=5.0)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS progress (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, dosha TEXT, score INTEGER)
+        """)
+        self.conn.commit()
+
+    def save_score(self, dosha, score, user_id=None):
+        self.conn.execute("INSERT INTO progress (date, dosha, score) VALUES (?, ?, ?)",
+                          (str(datetime.date.today()), dosha, score))
+        self.conn.commit()
+
+    def get_last_30_days(self, user_id=None):
+        since = str(datetime.date.today() - datetime.timedelta(days=30))
+        return self.conn.execute("SELECT date, dosha, score FROM progress WHERE date >= ? ORDER BY date",
+                                 (since,)).fetchall()
+
+
+class PooledProgressDB:
+    """Pooled WAL connections, but every save committed on the caller's thread."""
+    def __init__(self, path):
+        self.pool = get_pool(path)
+        self.reader = ProgressDB(path)
+
+    def save_score(self, dosha, score, user_id="default"):
+        with self.pool.connection() as conn, conn:
+            insert_rows(conn, [(user_id, day_to_int(datetime.date.today()), dosha, score)])
+
+    def get_last_30_days(self, user_id="default"):
+        return self.reader.get_last_30_days(user_id)
+
+
+def run(factory, path, threads):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def worker(n):
+        mine = []
+        for i in range(OPS_PER_THREAD):
+            start = time.perf_counter()
+            try:
+                db = factory(path)
+                if i % 5 == 4:
+                    db.get_last_30_days(user_id=f"reader{n}")
+                else:
+                    db.save_score("Vata", i % 100, user_id=f"user{n}")
+            except sqlite3.Error as e:
+                errors.append(e)
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    writer = getattr(factory(path), "writer", None)
+    if writer is not None:
+        writer.flush()  # throughput counts the commits, not just the enqueues
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p = lambda q: latencies[int(q * (len(latencies) - 1))] * 1000
+    return len(latencies) / elapsed, p(0.5), p(0.99), len(errors)
+
+
+def main():
+    variants = [("connect per call", LegacyProgressDB), ("pooled + WAL", PooledProgressDB),
+                ("write-behind", ProgressDB)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for threads in (1, 4, 16):
+            for name, factory in variants:
+                path = os.path.join(tmp, f"{factory.__name__}_{threads}.db")
+                ops, p50, p99, errors = run(factory, path, threads)
+                print(f"{threads:>2} threads  {name:<17} {ops:8,.0f} ops/s   p50 {p50:7.2f} ms   "
+                      f"p99 {p99:7.2f} ms   locked errors {errors}")
+        progress_db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-user progress queries on a large history: 100k users x 2 years of daily
+saves (73M rows, about 4 GB) by default. The database is generated once and
+reused on later runs; --users/--days make a smaller one for a quick check.
+
+    python benchmarks/bench_progress_queries.py                      # writes bench_progress.db
+    python benchmarks/bench_progress_queries.py --users 1000 --days 365 --path small.db
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import progress_db
+from progress_db import ProgressDB, get_pool, day_to_int
+from analytics import WellnessAnalytics
+
+DOSHAS = ("Vata", "Pitta", "Kapha")
+
+
+def generate(path, users, days, seed=7):
+    """One save per user per day for the last `days` days, committed one user at a time."""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    dates = [day_to_int(today - datetime.timedelta(days=i)) for i in range(days - 1, -1, -1)]
+    start = time.perf_counter()
+    with get_pool(path).connection() as conn:
+        for u in range(users):
+            user_id = f"user{u:06d}"
+            rows = [(user_id, date, rng.choice(DOSHAS), rng.randint(0, 100)) for date in dates]
+            with conn:
+                progress_db.insert_rows(conn, rows)
+            if (u + 1) % 5000 == 0:
+                print(f"   {u + 1:,} users ({time.perf_counter() - start:.0f} s)")
+        conn.execute("ANALYZE")
+    print(f"📦 {users:,} users x {days} days = {users * days:,} rows, "
+          f"{os.path.getsize(path) / 1e9:.2f} GB in {time.perf_counter() - start:.0f} s")
+
+
+def percentiles(fn, samples):
+    times = []
+    for arg in samples:
+        start = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--path", default="bench_progress.db")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        generate(args.path, args.users, args.days)
+    db = ProgressDB(args.path)
+    rng = random.Random(1)
+    users = [f"user{rng.randrange(args.users):06d}" for _ in range(args.samples)]
+
+    analytics = WellnessAnalytics.__new__(WellnessAnalytics)  # same object, pointed at the bench file
+    analytics.db = db
+    checks = [
+        ("get_last_30_days", lambda u: db.get_last_30_days(u)),
+        ("get_last_30_days(days=365)", lambda u: db.get_last_30_days(u, days=365)),
+        ("get_daily_scores(days=365)", lambda u: db.get_daily_scores(u, days=365)),
+        ("save_score (queued)", lambda u: db.save_score("Vata", 50, user_id=u)),
+        ("generate_insights", lambda u: (setattr(analytics, "user_id", u), analytics.generate_insights())),
+    ]
+    for name, fn in checks:
+        p50, p99 = percentiles(fn, users)
+        print(f"{name:<30} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+    db.writer.flush()
+
+    # The same 30-day query with the index bypassed, for scale (a full table scan)
+    since = day_to_int(datetime.date.today() - datetime.timedelta(days=30))
+    with db.pool.connection() as conn:
+        start = time.perf_counter()
+        conn.execute("SELECT date, dosha, score FROM progress NOT INDEXED WHERE user_id = ? AND date >= ?",
+                     (users[0], since)).fetchall()
+        print(f"{'same query, NOT INDEXED':<30} {(time.perf_counter() - start) * 1000:12.1f} ms")
+    progress_db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Scoring latency: vectorized _score_catalog vs the per-row _calculate_score apply,
+on the dish catalog repeated up to 300 / 100k / 1M dishes.
+
+    python benchmarks/bench_scoring.py
+"""
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dish_catalog import DishCatalog
+from recommender import DietRecommender
+
+APPLY_LIMIT = 100_000  # the row-wise apply takes minutes beyond this
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    engine = DietRecommender("dishes_dataset.csv")
+    base = pd.read_csv("dishes_dataset.csv")
+    args = ("Vata", "Pitta", "Winter")
+
+    for n in (300, 100_000, 1_000_000):
+        df = pd.concat([base] * -(-n // len(base)), ignore_index=True).head(n)
+        catalog = DishCatalog.from_frame(df)
+        vectorized = best_of(lambda: engine._score_catalog(*args, catalog))
+        line = f"{n:>9,} dishes   vectorized {vectorized * 1000:9.2f} ms"
+        if n <= APPLY_LIMIT:
+            frame = catalog.df
+            row_wise = best_of(lambda: frame.apply(lambda row: engine._calculate_score(row, *args), axis=1), 1)
+            line += f"   apply {row_wise * 1000:10.1f} ms   ({row_wise / vectorized:,.0f}x)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # diet_pdf.py
 import os
-import pandas as pd
+import numpy as np
+from dish_catalog import get_catalog
 
 from reportlab.platypus import (
     SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
@@ -21,28 +22,40 @@ os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 
 class DietPDFGenerator:
     def __init__(self, csv_path):
-        self.df = pd.read_csv(csv_path)
+        # Shared, process-wide catalog (CSV or compiled .dvcat, see dish_catalog.py)
+        self.csv_path = csv_path
+        get_catalog(csv_path)
         self.styles = getSampleStyleSheet()
 
+    @property
+    def catalog(self):
+        return get_catalog(self.csv_path)
+
+    @property
+    def df(self):
+        return self.catalog.df
+
     # ---------------------------------------------------------
     # FILTER BY DOSHA
     # ---------------------------------------------------------
-    def filter_by_dosha(self, dosha):
-        dosha = dosha.lower()
-        
-        # Handle dual doshas (e.g., "Pitta-Vata" or "Vata-Pitta")
-        if "-" in dosha:
-            doshas = [d.strip() for d in dosha.split("-")]
-            # Create a mask that matches if dish is suitable for ANY of the doshas
-            mask = self.df["dosha_suitable_for"].str.lower().str.contains(doshas[0], na=False)
-            for d in doshas[1:]:
-                mask = mask | self.df["dosha_suitable_for"].str.lower().str.contains(d, na=False)
-            return self.df[mask]
-        else:
-            # Single dosha - simple contains check
-            return self.df[self.df["dosha_suitable_for"]
-                           .str.lower()
-                           .str.contains(dosha, na=False)]
+    def filter_by_dosha(self, dosha, exclude_ingredients=None, require_ingredients=None, meal_type=None):
+        catalog = self.catalog
+
+        # Handle dual doshas (e.g., "Pitta-Vata" or "Vata-Pitta"):
+        # a dish matches if it is suitable for ANY of the doshas
+        mask = np.zeros(len(catalog), dtype=bool)
+        for d in dosha.split("-"):
+            mask = mask | catalog.suitable_mask(d)
+
+        # Optional meal filter, matched against the dish_type category codes
+        if meal_type:
+            mask = mask & catalog.meal_mask(meal_type)
+
+        # Optional ingredient filters resolved through the inverted index
+        allowed = catalog.ingredients.filter_mask(exclude_ingredients, require_ingredients)
+        if allowed is not None:
+            mask = mask & allowed
+        return catalog.take(np.flatnonzero(mask))
 
     # ---------------------------------------------------------
     # MANDALA HEADER FUNCTION
@@ -66,9 +79,10 @@ class DietPDFGenerator:
     # ---------------------------------------------------------
     # FULL FOOD CHART — PREMIUM CARD DESIGN
     # ---------------------------------------------------------
-    def generate_full_chart(self, dosha, out_path="full_diet_chart.pdf"):
+    def generate_full_chart(self, dosha, out_path="full_diet_chart.pdf",
+                            exclude_ingredients=None, require_ingredients=None):
 
-        data = self.filter_by_dosha(dosha)
+        data = self.filter_by_dosha(dosha, exclude_ingredients, require_ingredients)
         if data.empty:
             raise ValueError("No dishes found for this dosha.")
 
@@ -0,0 +1,434 @@
+# dish_catalog.py
+import os
+import sys
+import json
+import hashlib
+import threading
+import time
+import datetime
+import numpy as np
+import pandas as pd
+
+from ingredient_index import IngredientIndex
+from similarity_index import SimilarityIndex
+
+DOSHAS = ["Vata", "Pitta", "Kapha"]
+SEASONS = ["Winter", "Summer", "Monsoon"]
+TRIDOSHIC = "Kapha, Pitta, Vata"
+
+# Packed flag layout: bit i = DOSHAS[i] / SEASONS[i], bit 3 = tridoshic / 'All' seasons
+EXTRA_BIT = 3
+
+COMPILED_SUFFIX = ".dvcat"
+FORMAT_VERSION = 1
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _frozen(arr):
+    # Shared arrays are read by every request thread -> make accidental writes fail loudly
+    arr.flags.writeable = False
+    return arr
+
+def _contains(values, token):
+    """Boolean array: does `token` appear in each string (same substring check as _calculate_score)?"""
+    return pd.Series(values).astype(str).str.contains(token, regex=False).to_numpy()
+
+def _read_csv(csv_path):
+    return _prepare(pd.read_csv(csv_path))
+
+def _prepare(df):
+    # Fill NaNs to prevent errors
+    df['avoids_for'] = df['avoids_for'].fillna('')
+    df['season'] = df['season'].fillna('All')
+    return df
+
+def _pack_flags(df):
+    """Pack dosha / season membership of every dish into one byte per column."""
+    suitable = _contains(df['dosha_suitable_for'], TRIDOSHIC).astype(np.uint8) << EXTRA_BIT
+    avoids = np.zeros(len(df), dtype=np.uint8)
+    for i, d in enumerate(DOSHAS):
+        suitable |= _contains(df['dosha_suitable_for'], d).astype(np.uint8) << i
+        avoids |= _contains(df['avoids_for'], d).astype(np.uint8) << i
+
+    seasons = (df['season'] == 'All').to_numpy().astype(np.uint8) << EXTRA_BIT
+    for i, s in enumerate(SEASONS):
+        seasons |= _contains(df['season'], s).astype(np.uint8) << i
+    return suitable, avoids, seasons
+
+
+class StringTable:
+    """
+    Read-only string column stored as one UTF-8 buffer plus row offsets,
+    so it can live in a memory-mapped file and be decoded row by row.
+    """
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(values):
+        encoded = [("" if v is None or (isinstance(v, float) and np.isnan(v)) else str(v)).encode("utf-8")
+                   for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return data, offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def take(self, idx):
+        start, end = self.offsets[idx], self.offsets[np.asarray(idx) + 1]
+        return np.array([self.data[a:b].tobytes().decode("utf-8") for a, b in zip(start, end)], dtype=object)
+
+
+# ---------------------------------------------------------
+# COMPILE STEP: CSV -> columnar, memory-mappable artifact
+# ---------------------------------------------------------
+def compiled_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + COMPILED_SUFFIX
+
+def compile_catalog(csv_path, out_dir=None):
+    """
+    Compile the dish CSV into a directory of .npy arrays:
+    packed dosha/season bitmasks, dish_type codes, ingredient postings, the
+    "more like this" neighbor lists and one string table per text column.
+    Returns the artifact path.
+    """
+    out_dir = out_dir or compiled_path_for(csv_path)
+    df = _read_csv(csv_path)
+    suitable, avoids, seasons = _pack_flags(df)
+    dish_type_codes, dish_types = pd.factorize(df['dish_type'].fillna(''))
+    ingredients = IngredientIndex(df['ingredients'])
+    similarity = SimilarityIndex(DishCatalog.from_frame(df))
+
+    # Write into a temp dir and rename, so readers never see a half-written artifact
+    tmp_dir = out_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    arrays = {
+        "suitable_bits": suitable,
+        "avoids_bits": avoids,
+        "season_bits": seasons,
+        "dish_type_codes": dish_type_codes.astype(np.int16),
+        "ingredient_rows": ingredients.rows,
+        "ingredient_bounds": ingredients.bounds,
+    }
+    arrays.update({f"similarity_{name}": arr for name, arr in similarity.arrays().items()})
+    for col in df.columns:
+        arrays[f"str_{col}_data"], arrays[f"str_{col}_offsets"] = StringTable.encode(df[col])
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_dir, name + ".npy"), arr)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "source_hash": _file_hash(csv_path),
+        "n_dishes": len(df),
+        "columns": list(df.columns),
+        "dish_types": list(dish_types),
+        "ingredient_vocab": list(ingredients.vocab),
+        "similarity": True,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    if os.path.isdir(out_dir):
+        old_dir = out_dir + ".old"
+        os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        for name in os.listdir(old_dir):
+            os.remove(os.path.join(old_dir, name))
+        os.rmdir(old_dir)
+    else:
+        os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+class DishCatalog:
+    """
+    Immutable view of one version of the dish catalog plus its precomputed
+    membership arrays. Requests grab one catalog and never see a half-reload.
+
+    Loads either the CSV, or a compiled `.dvcat` artifact (passed directly, or
+    found next to the CSV with a matching source hash). Compiled arrays are
+    memory-mapped read-only, so preforked workers share one physical copy.
+    """
+    def __init__(self, dishes_file):
+        self.dishes_file = dishes_file
+
+        if os.path.isdir(dishes_file):
+            compiled, self.stat_path = dishes_file, os.path.join(dishes_file, "meta.json")
+        else:
+            compiled, self.stat_path = compiled_path_for(dishes_file), dishes_file
+        self.mtime = os.path.getmtime(self.stat_path)
+        self.content_hash = _file_hash(self.stat_path)
+
+        meta = self._read_meta(compiled)
+        if meta is not None and (compiled == dishes_file or meta["source_hash"] == self.content_hash):
+            self._load_compiled(compiled, meta)
+        else:
+            self._use_frame(_read_csv(dishes_file))
+        self._build_masks()
+        # Build the ingredient index now, not on the first request that needs it. The
+        # neighbor index is compiled into .dvcat artifacts; from a CSV it is built on first use.
+        self.ingredients
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Catalog over an in-memory frame, e.g. one chunk of a streamed CSV.
+        Not tied to a file; the ingredient index is only built if a filter asks for it.
+        """
+        catalog = cls.__new__(cls)
+        catalog.dishes_file = catalog.stat_path = None
+        catalog.mtime = catalog.content_hash = None
+        catalog._use_frame(_prepare(df.reset_index(drop=True)))
+        catalog._build_masks()
+        return catalog
+
+    def _build_masks(self):
+        # Per-dish membership arrays, computed once at load, so scoring the
+        # whole catalog is a few NumPy operations per request
+        self.suitable = {d: _frozen((self._suitable_bits >> i) & 1 == 1) for i, d in enumerate(DOSHAS)}
+        self.avoids = {d: _frozen((self._avoids_bits >> i) & 1 == 1) for i, d in enumerate(DOSHAS)}
+        self.tridoshic = _frozen((self._suitable_bits >> EXTRA_BIT) & 1 == 1)
+        self.in_season = {s: _frozen((self._season_bits >> i) & 1 == 1) for i, s in enumerate(SEASONS)}
+        self.all_seasons = _frozen((self._season_bits >> EXTRA_BIT) & 1 == 1)
+
+    @staticmethod
+    def _read_meta(compiled):
+        try:
+            with open(os.path.join(compiled, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return meta if meta.get("format") == FORMAT_VERSION else None
+
+    def _use_frame(self, df):
+        self._df = df
+        self._tables = None
+        self.columns = list(df.columns)
+        self.n_dishes = len(df)
+        self._suitable_bits, self._avoids_bits, self._season_bits = _pack_flags(df)
+        codes, dish_types = pd.factorize(df['dish_type'].fillna(''))
+        self._dish_type_codes, self.dish_types = codes, list(dish_types)
+        self._ingredients = None
+        self._similarity = None
+        self._similarity_lock = threading.Lock()
+        self.compiled = False
+
+    def _load_compiled(self, path, meta):
+        def load(name):
+            return np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+
+        self._df = None
+        self.columns = meta["columns"]
+        self.n_dishes = meta["n_dishes"]
+        self._tables = {col: StringTable(load(f"str_{col}_data"), load(f"str_{col}_offsets"))
+                        for col in self.columns}
+        self._suitable_bits = load("suitable_bits")
+        self._avoids_bits = load("avoids_bits")
+        self._season_bits = load("season_bits")
+        self._dish_type_codes, self.dish_types = load("dish_type_codes"), meta["dish_types"]
+        self._ingredients = IngredientIndex.from_postings(
+            meta["ingredient_vocab"], load("ingredient_rows"), load("ingredient_bounds"), self.n_dishes
+        )
+        self._similarity = None
+        self._similarity_lock = threading.Lock()
+        if meta.get("similarity"):
+            self._similarity = SimilarityIndex.from_arrays(
+                self, *(load(f"similarity_{name}") for name in
+                        ("profile_of", "neighbors", "scores", "members", "member_bounds"))
+            )
+        self.compiled = True
+
+    def __len__(self):
+        return self.n_dishes
+
+    @property
+    def ingredients(self):
+        if self._ingredients is None:
+            self._ingredients = IngredientIndex(self._df['ingredients'])
+        return self._ingredients
+
+    @property
+    def similarity(self):
+        if self._similarity is None:
+            with self._similarity_lock:  # one build even if several requests arrive at once
+                if self._similarity is None:
+                    self._similarity = SimilarityIndex(self)
+        return self._similarity
+
+    def avoid_mask(self, dosha):
+        """Dishes that aggravate `dosha` ("Vata" or dual "Vata-Pitta"), via the precomputed masks."""
+        mask = np.zeros(self.n_dishes, dtype=bool)
+        for avoids in self.avoid_masks(dosha):
+            mask = mask | avoids
+        return mask
+
+    def avoid_masks(self, dosha):
+        """One avoids_for mask per dosha of `dosha`; the precomputed arrays themselves, not copies."""
+        return [self.membership(self.avoids, 'avoids_for', d.strip().capitalize())
+                for d in dosha.split("-") if d.strip()]
+
+    # ---------------------------------------------------------
+    # QUERIES
+    # ---------------------------------------------------------
+    def column(self, name):
+        """Every value of a column (decodes the whole string table for compiled catalogs)."""
+        if self._df is not None:
+            return self._df[name].to_numpy()
+        return self._tables[name].take(np.arange(self.n_dishes))
+
+    def take(self, idx, columns=None):
+        """DataFrame of the given row numbers, indexed by row number like the CSV frame."""
+        columns = columns or self.columns
+        idx = np.asarray(idx, dtype=np.int64)
+        if self._df is not None:
+            return self._df.loc[idx, columns]
+        return pd.DataFrame({col: self._tables[col].take(idx) for col in columns},
+                            index=pd.Index(idx), columns=columns)
+
+    @property
+    def df(self):
+        """The full catalog as a DataFrame (materialized on every call for compiled catalogs)."""
+        if self._df is not None:
+            return self._df
+        return self.take(np.arange(self.n_dishes))
+
+    def contains(self, column, token):
+        return _contains(self.column(column), token)
+
+    def membership(self, table, column, token):
+        # Known doshas/seasons hit the precomputed arrays; anything else is scanned on demand
+        if token in table:
+            return table[token]
+        return self.contains(column, token)
+
+    def meal_mask(self, meal_type):
+        """Dishes whose dish_type equals `meal_type` (case-insensitive), via the category codes."""
+        codes = [i for i, label in enumerate(self.dish_types) if label.lower() == meal_type.lower()]
+        return np.isin(self._dish_type_codes, codes)
+
+    def suitable_mask(self, dosha):
+        """Dishes suitable for `dosha`, case-insensitive ("vata" and "Vata" both work)."""
+        name = dosha.strip().capitalize()
+        if name in self.suitable:
+            return self.suitable[name]
+        column = pd.Series(self.column('dosha_suitable_for')).astype(str).str.lower()
+        return _contains(column, dosha.strip().lower())
+
+
+# ---------------------------------------------------------
+# PROCESS-WIDE SHARED CATALOGS
+# ---------------------------------------------------------
+_catalogs = {}
+_catalog_stats = {}
+_watchers = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(dishes_file="dishes_dataset.csv"):
+    """
+    The one DishCatalog of this process for `dishes_file`. The recommender,
+    the PDF generator and both servers all query this instance instead of
+    parsing the CSV themselves.
+    """
+    key = os.path.abspath(dishes_file)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(key)
+            if catalog is None:
+                catalog = DishCatalog(dishes_file)
+                catalog.generation = 1
+                _catalogs[key] = catalog
+                _catalog_stats[key] = {"generation": 1, "reloads": 0, "last_reload_seconds": None,
+                                       "last_reload_at": None}
+    return catalog
+
+def reload_catalog(dishes_file="dishes_dataset.csv", force=False):
+    """
+    Build a fresh catalog (indexes and all) from the file, then atomically swap
+    the shared reference. Requests already holding the old catalog finish on it.
+    Without `force`, nothing is rebuilt unless the file's content changed.
+    Returns True if a new generation was installed.
+    """
+    key = os.path.abspath(dishes_file)
+    current = get_catalog(dishes_file)
+    if not force:
+        mtime = os.path.getmtime(current.stat_path)
+        if mtime == current.mtime:
+            return False
+        if _file_hash(current.stat_path) == current.content_hash:
+            # Touched or re-saved unchanged: remember the new mtime so we don't re-hash every poll
+            current.mtime = mtime
+            return False
+
+    with _catalogs_lock:
+        if _catalogs[key] is not current:
+            return False  # another thread already swapped in a newer one
+        start = time.perf_counter()
+        fresh = DishCatalog(dishes_file)
+        stats = _catalog_stats[key]
+        fresh.generation = stats["generation"] + 1
+        _catalogs[key] = fresh
+        stats.update(generation=fresh.generation, reloads=stats["reloads"] + 1,
+                     last_reload_seconds=round(time.perf_counter() - start, 4),
+                     last_reload_at=datetime.datetime.now().isoformat(timespec="seconds"))
+    print(f"🔄 Dish catalog reloaded (generation {fresh.generation}, {stats['last_reload_seconds']}s)")
+    return True
+
+def refresh_catalog(dishes_file="dishes_dataset.csv"):
+    """
+    Return the shared catalog. Without a background watcher, a changed file is
+    reloaded inline first; with one, the request never waits for a rebuild.
+    """
+    if os.path.abspath(dishes_file) not in _watchers:
+        try:
+            reload_catalog(dishes_file)
+        except Exception as e:
+            # Keep serving the last good catalog (e.g. file caught mid-write)
+            print(f"⚠️ Dish catalog reload failed: {e}")
+    return get_catalog(dishes_file)
+
+def catalog_stats(dishes_file="dishes_dataset.csv"):
+    """Snapshot generation and reload-duration counters for monitoring."""
+    get_catalog(dishes_file)
+    return dict(_catalog_stats[os.path.abspath(dishes_file)])
+
+def start_catalog_watcher(dishes_file="dishes_dataset.csv", interval=5.0):
+    """
+    Poll the dataset file every `interval` seconds on a daemon thread and hot-swap
+    the catalog when its content changes, so editors don't need a server restart.
+    """
+    key = os.path.abspath(dishes_file)
+    with _catalogs_lock:
+        if key in _watchers:
+            return _watchers[key]
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    reload_catalog(dishes_file)
+                except Exception as e:
+                    # Keep serving the last good catalog (e.g. file caught mid-write)
+                    print(f"⚠️ Dish catalog reload failed: {e}")
+
+        watcher = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+        _watchers[key] = watcher
+    watcher.start()
+    return watcher
+
+
+# --- CLI: python dish_catalog.py dishes_dataset.csv [out_dir] ---
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "dishes_dataset.csv"
+    dst = sys.argv[2] if len(sys.argv) > 2 else None
+    path = compile_catalog(src, dst)
+    print(f"✅ Compiled {src} -> {path}")
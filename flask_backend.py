@@ -3,14 +3,20 @@ from flask_cors import CORS
 from analytics import WellnessAnalytics
 import sys
 import os
+import io
+import hmac
+from functools import wraps
 
 # --- IMPORT YOUR MODULES ---
 # This looks for the files in the same folder
 try:
-    from predictor import DietVedaAI
-    from recommender import DietRecommender
+    from model_registry import ModelManager
+    from online_learner import OnlineLearner
+    from recommender import DietRecommender, parse_k
     from yoga_coach import YogaCoach
     from routine_tracker import SattvaTracker
+    from progress_db import DEFAULT_USER, get_writer, writer_metrics, start_compaction, compaction_metrics
+    from dish_catalog import get_catalog, start_catalog_watcher, reload_catalog, catalog_stats
 except ImportError as e:
     print("❌ CRITICAL ERROR: Missing Module.")
     print(f"Details: {e}")
@@ -20,12 +26,47 @@ except ImportError as e:
 app = Flask(__name__)
 CORS(app)  # This is crucial! It allows React/Mobile to talk to Python.
 
+# Admin routes change what every user is served, and CORS lets any web page call
+# them. With DIETVEDA_ADMIN_TOKEN set they need an "X-Admin-Token" header; without
+# it they only answer non-browser requests (no Origin header) from this machine.
+ADMIN_TOKEN = os.environ.get("DIETVEDA_ADMIN_TOKEN")
+
+def admin_only(view):
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        if ADMIN_TOKEN:
+            allowed = hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+        else:
+            allowed = request.remote_addr in ("127.0.0.1", "::1") and "Origin" not in request.headers
+        if not allowed:
+            return jsonify({"error": "admin access required"}), 403
+        return view(*args, **kwargs)
+    return guarded
+
 # --- INITIALIZE ENGINES ONCE (At Startup) ---
+def _swap_brain(brain):
+    # Called by the model manager once a new version passed validation
+    global ai_brain
+    learner.attach(brain)  # re-apply practitioner feedback before it serves
+    ai_brain = brain
+
 print("🔄 Booting DietVeda Server...")
 try:
-    ai_brain = DietVedaAI()
+    # Versioned model: admin endpoints / CURRENT pointer swap `ai_brain` in the background
+    model_manager = ModelManager(on_swap=_swap_brain)
+    ai_brain = model_manager.brain
+    model_manager.start_watcher(interval=5.0)
+    # Confirmed diagnoses from /feedback are folded into ai_brain every 30 s
+    learner = OnlineLearner(ai_brain)
+    learner.start(interval=30.0)
     diet_engine = DietRecommender("dishes_dataset.csv")
+    # Hot-reload dishes_dataset.csv edits in the background (no restart needed)
+    start_catalog_watcher("dishes_dataset.csv", interval=5.0)
     yoga_engine = YogaCoach()
+    # Score saves are group-committed by a background writer (flush every 50 ms or 500 rows)
+    get_writer(batch_size=500, flush_interval=0.05)
+    # Daily: months older than the 90-day horizon move to the monthly archive table
+    start_compaction(horizon_days=90)
     routine_engine = SattvaTracker()
     print("✅ All Engines Online & Ready to Serve.")
 except Exception as e:
@@ -79,15 +120,94 @@ def chatbot():
 def predict_dosha():
     """
     Frontend sends: { "digestion": "fast", "sleep": "deep", ... }
-    Backend replies: { "dosha": "Vata", "confidence": "85%" }
+    Backend replies: { "dosha": "Vata", "confidence": "85%", "model_version": "v0003" }
+    With ?explain=1 the reply also has "explanation": per-answer contributions
+    to each dosha and the answers that pushed hardest toward the result.
     """
     try:
         user_data = request.json
-        result = ai_brain.predict(user_data)
+        explain = request.args.get('explain', '0').lower() in ('1', 'true', 'yes')
+        brain = ai_brain  # one model for the whole request, even if a swap lands mid-way
+        result = brain.predict(user_data, explain=explain)
+        result["model_version"] = brain.version
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@app.route('/predict_dosha_batch', methods=['POST'])
+def predict_dosha_batch():
+    """
+    Frontend sends: { "profiles": [ { "digestion": "fast", ... }, ... ] }
+    Backend replies: { "results": [ { "dosha": "Vata", ... } | { "error": "..." }, ... ],
+                       "count": 2, "errors": 0, "model_version": "v0003" }
+    """
+    try:
+        data = request.json
+        profiles = data.get('profiles') if isinstance(data, dict) else data
+        if not isinstance(profiles, list):
+            return jsonify({"error": "profiles must be a list"}), 400
+
+        brain = ai_brain
+        results = brain.predict_batch(profiles)
+        return jsonify({
+            "results": results,
+            "count": len(results),
+            "errors": sum(1 for r in results if "error" in r),
+            "model_version": brain.version
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/next_question', methods=['POST'])
+def next_question():
+    """
+    Adaptive quiz. Frontend sends the answers so far: { "answers": { "digestion": "fast" } }
+    Backend replies: { "done": false, "question": "mood", "options": [...], ... }
+                  or { "done": true, "result": { "dosha": "Vata", ... }, "questions_asked": 4 }
+    """
+    try:
+        data = request.json or {}
+        brain = ai_brain
+        step = brain.next_question(data.get('answers') or {})
+        if "error" in step:
+            return jsonify(step), 400
+        step["model_version"] = brain.version
+        return jsonify(step)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/feedback', methods=['POST'])
+@admin_only
+def feedback():
+    """
+    Practitioner confirms or corrects a diagnosis:
+    { "profile": { "digestion": "fast", ... }, "dosha": "Pitta" }   (or "Vata-Pitta")
+    Applied to /predict_dosha on the next background update. Admin-only: a few
+    dozen confirmations are enough to change what a profile is served.
+    """
+    try:
+        data = request.json or {}
+        learner.record(data.get('profile') or {}, data.get('dosha'))
+        return jsonify({"status": "recorded"}), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _analytics_days():
+    """?days= for analytics (default 30, up to ten years)"""
+    return min(max(request.args.get('days', 30, type=int), 1), 3660)
+
+def _current_user():
+    """
+    Whose progress history a request touches: JSON "user_id", ?user_id=, or X-User-Id.
+    Not authenticated: the id (a random UUID the browser keeps in localStorage)
+    is a bearer token, and anyone who knows it can read and write that history.
+    """
+    data = request.get_json(silent=True) if request.is_json else None
+    user_id = (data or {}).get('user_id') or request.args.get('user_id') or request.headers.get('X-User-Id')
+    return str(user_id)[:64] if user_id else DEFAULT_USER
+
 @app.route('/save_quiz_score', methods=['POST'])
 def save_quiz_score():
     """Save dosha quiz score to analytics database"""
@@ -98,8 +218,10 @@ def save_quiz_score():
         score = data.get('score', 0)
         
         db = ProgressDB()
-        db.save_score(dosha, score)
+        db.save_score(dosha, score, user_id=_current_user())
         return jsonify({"status": "saved"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -113,15 +235,18 @@ def save_routine_score():
         score = data.get('score', 0)
         
         db = ProgressDB()
-        db.save_score(dosha, score)
+        db.save_score(dosha, score, user_id=_current_user())
         return jsonify({"status": "saved"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/get_diet', methods=['POST'])
 def get_diet():
     """
-    Frontend sends: { "dosha": "Vata", "meal": "Lunch" }
+    Frontend sends: { "dosha": "Vata", "meal": "Lunch",
+                      "exclude_ingredients": ["peanut"], "require_ingredients": "ghee" }  (filters optional)
     Backend replies: List of foods
     """
     try:
@@ -129,36 +254,121 @@ def get_diet():
         dosha = data.get('dosha')
         meal = data.get('meal')
         
-        # Get recommendations from your existing engine
-        recommendations = diet_engine.recommend(dosha, meal_type=meal)
-        
-        if recommendations.empty:
-            return jsonify([])
-        
-        # Rename dish_type to meal_type for consistency in frontend
-        if 'dish_type' in recommendations.columns:
-            recommendations = recommendations.rename(columns={'dish_type': 'meal_type'})
-        
-        # Remove score column if it exists (we don't want to show scores)
-        if 'score' in recommendations.columns:
-            recommendations = recommendations.drop(columns=['score'])
-        
-        # Select only the columns we want to send to frontend
-        columns_to_include = ['dish_name', 'ingredients', 'season', 'meal_type']
-        # Add optional columns if they exist
-        optional_columns = ['taste_profile', 'effect', 'dosha_suitable_for']
-        for col in optional_columns:
-            if col in recommendations.columns:
-                columns_to_include.append(col)
-        
-        available_columns = [col for col in columns_to_include if col in recommendations.columns]
-        recommendations = recommendations[available_columns]
-        
-        # Convert Pandas DataFrame to JSON
-        return jsonify(recommendations.to_dict(orient='records'))
+        # Served from the engine's precomputed ranking table
+        records = diet_engine.recommend_records(
+            dosha, meal_type=meal,
+            exclude_ingredients=data.get('exclude_ingredients'),
+            require_ingredients=data.get('require_ingredients')
+        )
+        return jsonify(_diet_records_for_frontend(records))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/get_diet_all', methods=['POST'])
+def get_diet_all():
+    """
+    Frontend sends: { "dosha": "Vata", "k": 10 }   (k may also be { "Lunch": 5, "All": 20 })
+    Backend replies: { "Breakfast": [...], "Lunch": [...], ..., "All": [...] }
+    One scoring pass for the whole page instead of one request per meal.
+    """
+    try:
+        data = request.json
+        dosha = data.get('dosha')
+        if not dosha:
+            return jsonify({"error": "Dosha is required"}), 400
+        k = data.get('k', 10)
+
+        meals = diet_engine.recommend_all(
+            dosha, k=k,
+            exclude_ingredients=data.get('exclude_ingredients'),
+            require_ingredients=data.get('require_ingredients')
+        )
+        return jsonify({meal: _diet_records_for_frontend(records) for meal, records in meals.items()})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/get_meal_plan', methods=['POST'])
+def get_meal_plan():
+    """
+    Frontend sends: { "dosha": "Vata", "days": 7, "max_repeats": 1,
+                      "exclude_ingredients": [...], "require_ingredients": [...] }  (all but dosha optional)
+    Backend replies: { "days": [ { "day": 1, "Breakfast": {...}, "Lunch": {...}, "Dinner": {...} }, ... ] }
+    """
+    try:
+        data = request.json
+        dosha = data.get('dosha')
+        if not dosha:
+            return jsonify({"error": "Dosha is required"}), 400
+
+        try:
+            days = int(data.get('days', 7))
+            max_repeats = int(data.get('max_repeats', 1))
+        except (TypeError, ValueError):
+            return jsonify({"error": "days and max_repeats must be whole numbers"}), 400
+        if days < 1 or max_repeats < 1:
+            return jsonify({"error": "days and max_repeats must be at least 1"}), 400
+
+        plan = diet_engine.plan_week(
+            dosha,
+            days=min(days, 31),
+            max_repeats=max_repeats,
+            exclude_ingredients=data.get('exclude_ingredients'),
+            require_ingredients=data.get('require_ingredients')
+        )
+        for day in plan['days']:
+            for meal, record in day.items():
+                if isinstance(record, dict):
+                    day[meal] = _diet_records_for_frontend([record])[0]
+        return jsonify(plan)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/similar_dishes', methods=['GET'])
+def similar_dishes():
+    """
+    Frontend asks: GET /similar_dishes?dish=Mint Pasta&dosha=Vata&k=10
+    Backend replies: { "dish": "Mint Pasta", "similar": [ {..., "similarity": 0.82}, ... ] }
+    Alternatives come from the precomputed neighbor index; dishes that
+    aggravate the user's dosha (avoids_for) are skipped.
+    """
+    dish = request.args.get('dish')
+    if not dish:
+        return jsonify({"error": "Dish is required"}), 400
+    dosha = request.args.get('dosha', '')
+    try:
+        k = parse_k(request.args.get('k', 10))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    catalog = get_catalog("dishes_dataset.csv")
+    row = catalog.similarity.find(dish)
+    if row is None:
+        return jsonify({"error": f"Unknown dish: {dish}"}), 404
+
+    # Checked per candidate against the precomputed masks: no full-catalog array per request
+    exclude = catalog.avoid_masks(dosha) if dosha else None
+    matches = catalog.similarity.similar(row, k=k, exclude=exclude)
+    columns = ['dish_name', 'dish_type', 'ingredients', 'season', 'taste_profile', 'effect']
+    dishes = catalog.take([r for r, _ in matches], columns).to_dict(orient='records')
+    for d, (_, score) in zip(dishes, matches):
+        d['meal_type'] = d.pop('dish_type')
+        d['similarity'] = score
+
+    return jsonify({"dish": catalog.take([row], ['dish_name']).iloc[0]['dish_name'], "similar": dishes})
+
+def _diet_records_for_frontend(records):
+    # Rename dish_type to meal_type for consistency in frontend (score stays hidden)
+    return [{
+        'dish_name': r['dish_name'],
+        'ingredients': r['ingredients'],
+        'season': r['season'],
+        'meal_type': r['dish_type'],
+    } for r in records]
+
 @app.route('/get_yoga', methods=['GET'])
 def get_yoga():
     """
@@ -207,23 +417,22 @@ def get_routine():
 
 @app.route('/analytics/graph')
 def analytics_graph():
-    """Generate and return progress graph"""
+    """Generate and return progress graph (?user_id=...&days=30|90|365)"""
     try:
-        wa = WellnessAnalytics()
-        path = wa.generate_progress_graph(out_path="progress.png")
-        if path and os.path.exists(path):
-            return send_file(path, mimetype='image/png')
-        # Fallback to existing file if generation fails
-        if os.path.exists("progress.png"):
-            return send_file("progress.png", mimetype='image/png')
-        return jsonify({"error":"no-data"}), 404
+        wa = WellnessAnalytics(_current_user())
+        # Rendered in memory: nothing is written to disk per user
+        image = io.BytesIO()
+        if wa.generate_progress_graph(out_path=image, days=_analytics_days()) is None:
+            return jsonify({"error":"no-data"}), 404
+        image.seek(0)
+        return send_file(image, mimetype='image/png')
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/analytics/insights')
 def analytics_insights():
-    wa = WellnessAnalytics()
-    return jsonify({"insights": wa.generate_insights()})
+    wa = WellnessAnalytics(_current_user())
+    return jsonify({"insights": wa.generate_insights(days=_analytics_days())})
 
 @app.route('/chat', methods=['POST'])
 def chat():
@@ -249,11 +458,15 @@ def chat():
 
 @app.route('/download/full/<dosha>')
 def download_full(dosha):
-    """Download full diet chart PDF"""
+    """Download full diet chart PDF (optional ?exclude_ingredients=a,b&require_ingredients=c)"""
     try:
         from diet_pdf import DietPDFGenerator
         generator = DietPDFGenerator("dishes_dataset.csv")
-        path = generator.generate_full_chart(dosha, "full_chart.pdf")
+        path = generator.generate_full_chart(
+            dosha, "full_chart.pdf",
+            exclude_ingredients=request.args.get('exclude_ingredients'),
+            require_ingredients=request.args.get('require_ingredients')
+        )
         return send_file(path, as_attachment=True, download_name=f"dietveda_full_{dosha}.pdf")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -268,7 +481,11 @@ def download_filtered(dosha, meal):
         # Use the SAME filtering logic as the UI (recommend() method)
         # This ensures PDF contains only the foods shown in the UI
         meal_type = '' if meal.lower() == 'all' else meal
-        recommendations = diet_engine.recommend(dosha, meal_type=meal_type)
+        recommendations = diet_engine.recommend(
+            dosha, meal_type=meal_type,
+            exclude_ingredients=request.args.get('exclude_ingredients'),
+            require_ingredients=request.args.get('require_ingredients')
+        )
         
         if recommendations.empty:
             return jsonify({"error": f"No dishes found for dosha: {dosha} and meal: {meal}"}), 404
@@ -295,6 +512,63 @@ def download_filtered(dosha, meal):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/admin/reload_catalog', methods=['POST'])
+@admin_only
+def admin_reload_catalog():
+    """Rebuild the dish catalog now and swap it in (in-flight requests finish on the old one)"""
+    try:
+        reload_catalog("dishes_dataset.csv", force=True)
+        return jsonify({"status": "reloaded", "catalog": catalog_stats("dishes_dataset.csv")})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/models', methods=['GET'])
+def admin_models():
+    """Published model versions, the live one, and the last activation result"""
+    return jsonify(model_manager.info())
+
+@app.route('/admin/models/activate', methods=['POST'])
+@admin_only
+def admin_activate_model():
+    """
+    Frontend sends: { "version": "v0004" }
+    Loads + validates in the background; poll GET /admin/models for the outcome.
+    """
+    try:
+        version = (request.json or {}).get('version')
+        model_manager.activate(version)
+        return jsonify({"status": "loading", "version": version}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/models/rollback', methods=['POST'])
+@admin_only
+def admin_rollback_model():
+    """Back to the previous version (or { "version": "v0002" }), validated like any activation"""
+    try:
+        version = (request.get_json(silent=True) or {}).get('version')
+        model_manager.rollback(version)
+        return jsonify({"status": "loading", "version": version or "previous"}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/metrics')
+def metrics():
+    """Engine counters for monitoring"""
+    return jsonify({
+        "diet_cache": diet_engine.cache_stats,
+        "catalog": catalog_stats("dishes_dataset.csv"),
+        "model": model_manager.info(),
+        "online_learning": dict(learner.stats),
+        "progress_writer": writer_metrics(),
+        "progress_compaction": compaction_metrics()
+    })
+
+
 # --- START SERVER ---
 if __name__ == '__main__':
     # Debug=True allows you to see errors in the console
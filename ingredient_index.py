@@ -0,0 +1,97 @@
+import sys
+import numpy as np
+import pandas as pd
+
+
+def parse_ingredient_list(value):
+    """
+    Accepts None, a list, or a comma-separated string ("ghee, Paneer")
+    and returns normalized ingredient names (["ghee", "paneer"]).
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [v.strip().lower() for v in value if v and v.strip()]
+
+
+class IngredientIndex:
+    """
+    Inverted index over the free-text `ingredients` column.
+
+    Every ingredient is interned into a vocabulary id, and each id keeps the
+    sorted row numbers that contain it (one flat `rows` array sliced by
+    `bounds`). Filters turn the requested postings into per-dish bitsets and
+    combine them with AND / OR, so no string is scanned at request time.
+    """
+    def __init__(self, ingredients):
+        ingredients = pd.Series(ingredients).reset_index(drop=True)
+
+        # "spinach, ghee, capsicum" -> one row per (dish, ingredient)
+        tokens = ingredients.fillna("").astype(str).str.lower().str.split(",").explode().str.strip()
+        tokens = tokens[tokens != ""]
+        codes, vocab = pd.factorize(tokens, sort=True)
+
+        # Group row numbers by ingredient id -> postings[bounds[i]:bounds[i + 1]] belong to vocab[i]
+        rows = tokens.index.to_numpy(dtype=np.int64)
+        order = np.lexsort((rows, codes))
+        rows, codes = rows[order], codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(vocab) + 1))
+
+        self._init(list(vocab), rows.astype(np.int32), bounds.astype(np.int64), len(ingredients))
+
+    @classmethod
+    def from_postings(cls, vocab, rows, bounds, n_dishes):
+        """Rebuild an index from saved postings (e.g. memory-mapped arrays of a compiled catalog)."""
+        index = cls.__new__(cls)
+        index._init(vocab, rows, bounds, n_dishes)
+        return index
+
+    def _init(self, vocab, rows, bounds, n_dishes):
+        self.n_dishes = n_dishes
+        self.vocab = {sys.intern(name): i for i, name in enumerate(vocab)}
+        self.rows = rows
+        self.bounds = bounds
+        self._by_dish = None
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def bitset(self, ingredient):
+        """Boolean mask of dishes containing `ingredient` (all False if unknown)."""
+        mask = np.zeros(self.n_dishes, dtype=bool)
+        idx = self.vocab.get(ingredient.strip().lower())
+        if idx is not None:
+            mask[self.rows[self.bounds[idx]:self.bounds[idx + 1]]] = True
+        return mask
+
+    def dish_bitset(self, row):
+        """Ingredients of one dish as a Python int bitset over vocabulary ids (for fast overlap checks)."""
+        if self._by_dish is None:
+            # Invert the postings once: dish -> ingredient ids
+            order = np.argsort(self.rows, kind="stable")
+            ids = np.repeat(np.arange(len(self.vocab)), np.diff(self.bounds))[order]
+            dish_bounds = np.searchsorted(self.rows[order], np.arange(self.n_dishes + 1))
+            self._by_dish = (ids, dish_bounds)
+        ids, dish_bounds = self._by_dish
+        bits = 0
+        for i in ids[dish_bounds[row]:dish_bounds[row + 1]].tolist():
+            bits |= 1 << i
+        return bits
+
+    def filter_mask(self, exclude_ingredients=None, require_ingredients=None):
+        """
+        Mask of dishes that contain none of `exclude_ingredients` and all of
+        `require_ingredients`. Returns None when no filter is requested.
+        """
+        exclude = parse_ingredient_list(exclude_ingredients)
+        require = parse_ingredient_list(require_ingredients)
+        if not exclude and not require:
+            return None
+
+        allowed = np.ones(self.n_dishes, dtype=bool)
+        for name in require:
+            allowed &= self.bitset(name)
+        for name in exclude:
+            allowed &= ~self.bitset(name)
+        return allowed
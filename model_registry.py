@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import datetime
+import threading
+import pandas as pd
+from predictor import DietVedaAI, MODEL_FILE, ENCODERS_FILE, COMPILED_MODEL_DIR
+
+MODEL_ROOT = os.environ.get("DIETVEDA_MODEL_ROOT", "models")
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# Stratified split of the labeled data that trian_brain.py kept out of training;
+# it is published inside each version directory, next to the manifest
+HOLDOUT_FILE = "dietveda_holdout.csv"
+# A new version must get at least this share of its holdout right to go live
+MIN_HOLDOUT_ACCURACY = 0.9
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def list_versions(root=MODEL_ROOT):
+    """Published versions, oldest first (v0001, v0002, ...)."""
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root)
+                  if d.startswith("v") and os.path.exists(os.path.join(root, d, MANIFEST_FILE)))
+
+
+def current_version(root=MODEL_ROOT):
+    """The version the CURRENT pointer names, or None for an empty registry."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(version, root=MODEL_ROOT):
+    with open(os.path.join(root, version, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def publish_model(source_dir="", root=MODEL_ROOT, notes=None):
+    """
+    Copies a trained model (pickles + compiled arrays) into a new,
+    never-modified version directory with a manifest of sha256 checksums. The
+    directory is assembled under a temp name and renamed into place, so
+    readers never see a half-copied version. Returns the version.
+    """
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = os.path.join(root, f".publish-{os.getpid()}-{time.time_ns()}")
+    os.makedirs(tmp_dir)
+
+    files = {}
+    for name in (MODEL_FILE, ENCODERS_FILE):
+        shutil.copy2(os.path.join(source_dir, name), os.path.join(tmp_dir, name))
+    if os.path.exists(os.path.join(source_dir, HOLDOUT_FILE)):
+        shutil.copy2(os.path.join(source_dir, HOLDOUT_FILE), os.path.join(tmp_dir, HOLDOUT_FILE))
+    compiled = os.path.join(source_dir, COMPILED_MODEL_DIR)
+    if os.path.isdir(compiled):
+        shutil.copytree(compiled, os.path.join(tmp_dir, COMPILED_MODEL_DIR))
+    for folder, _, names in os.walk(tmp_dir):
+        for name in names:
+            path = os.path.join(folder, name)
+            files[os.path.relpath(path, tmp_dir)] = _sha256(path)
+
+    # Claim the next version number; os.rename fails if another publisher got it first
+    while True:
+        existing = list_versions(root)
+        version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+        manifest = {
+            "version": version,
+            "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            "files": files,
+            "notes": notes,
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        try:
+            os.rename(tmp_dir, os.path.join(root, version))
+            return version
+        except OSError:
+            continue
+
+
+def verify_version(version, root=MODEL_ROOT):
+    """Raises ValueError if any file of the version is missing or its checksum differs."""
+    manifest = read_manifest(version, root)
+    for name, expected in manifest["files"].items():
+        path = os.path.join(root, version, name)
+        if not os.path.exists(path):
+            raise ValueError(f"{version}: missing {name}")
+        if _sha256(path) != expected:
+            raise ValueError(f"{version}: checksum mismatch for {name}")
+    return manifest
+
+
+def holdout_accuracy(brain, holdout_file):
+    """Share of labeled holdout profiles whose primary predicted dosha matches the label."""
+    holdout = pd.read_csv(holdout_file)
+    results = brain.predict_batch(holdout.drop(columns='dosha').to_dict('records'))
+    hits = sum(1 for r, label in zip(results, holdout['dosha'])
+               if "error" not in r and r["dosha"].split("-")[0] == label)
+    return hits / len(holdout)
+
+
+class ModelManager:
+    """
+    Owns the live DietVedaAI of a server. New versions are loaded, checksum-
+    verified and scored on their own holdout split (rows the model never
+    trained on) on a background thread; only then is
+    the reference swapped (a single assignment, so each request sees either
+    the old or the new model, never a mix) and the CURRENT pointer updated.
+    """
+    def __init__(self, root=MODEL_ROOT, on_swap=None, min_accuracy=MIN_HOLDOUT_ACCURACY):
+        self.root = root
+        self.on_swap = on_swap
+        self.min_accuracy = min_accuracy
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.status = {"state": "idle", "version": None, "error": None, "holdout_accuracy": None}
+
+        # Start on the registry's CURRENT version, or the loose files of an unversioned checkout
+        version = current_version(root)
+        if version:
+            self.brain = self._load(version)
+        else:
+            self.brain = DietVedaAI()
+
+    @property
+    def version(self):
+        return self.brain.version
+
+    def _load(self, version):
+        verify_version(version, self.root)
+        brain = DietVedaAI(os.path.join(self.root, version))
+        brain.version = version
+        return brain
+
+    def activate(self, version, background=True):
+        """Load, validate and swap in `version`. Returns the thread when run in the background."""
+        if version not in list_versions(self.root):
+            raise ValueError(f"Unknown model version '{version}'")
+        if not background:
+            return self._activate(version)
+        worker = threading.Thread(target=self._activate, args=(version,), name="model-loader", daemon=True)
+        worker.start()
+        return worker
+
+    def _activate(self, version):
+        with self._lock:
+            self.status = {"state": "loading", "version": version, "error": None, "holdout_accuracy": None}
+            try:
+                start = time.perf_counter()
+                brain = self._load(version)
+                holdout = os.path.join(self.root, version, HOLDOUT_FILE)
+                if os.path.exists(holdout):
+                    accuracy = holdout_accuracy(brain, holdout)
+                    if accuracy < self.min_accuracy:
+                        raise ValueError(f"holdout accuracy {accuracy:.3f} below {self.min_accuracy}")
+                else:
+                    # Published before holdout splits were kept: nothing unseen to score it on
+                    accuracy = None
+                    print(f"⚠️ Model {version} has no holdout split; activating without an accuracy check")
+
+                # Swap: in-flight requests finish on the model they already hold
+                self.brain = brain
+                if self.on_swap:
+                    self.on_swap(brain)
+                _write_atomic(os.path.join(self.root, CURRENT_FILE), version + "\n")
+                self.status = {"state": "active", "version": version, "error": None,
+                               "holdout_accuracy": None if accuracy is None else round(accuracy, 4),
+                               "load_seconds": round(time.perf_counter() - start, 4)}
+                print(f"🔄 Model {version} is live (holdout accuracy "
+                      f"{'n/a' if accuracy is None else f'{accuracy:.3f}'})")
+                return True
+            except Exception as e:
+                # Keep serving the current model
+                self.status = {"state": "failed", "version": version, "error": str(e), "holdout_accuracy": None}
+                print(f"⚠️ Model {version} rejected: {e}")
+                return False
+
+    def rollback(self, version=None, background=True):
+        """Go back to `version`, or by default to the newest version older than the live one."""
+        if version is None:
+            older = [v for v in list_versions(self.root) if self.version is None or v < self.version]
+            if not older:
+                raise ValueError("No older model version to roll back to")
+            version = older[-1]
+        return self.activate(version, background=background)
+
+    def info(self):
+        return {
+            "current": self.version,
+            "versions": list_versions(self.root),
+            "last_activation": dict(self.status),
+        }
+
+    def start_watcher(self, interval=5.0):
+        """
+        Poll the CURRENT pointer and activate whatever it names, so a version
+        promoted from the CLI (`python model_registry.py activate v0003`) goes
+        live without an admin call or restart.
+        """
+        if self._watcher is not None:
+            return self._watcher
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    wanted = current_version(self.root)
+                    if wanted and wanted != self.version and wanted != self.status.get("version"):
+                        self._activate(wanted)
+                except Exception as e:
+                    print(f"⚠️ Model watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+
+# --- CLI: python model_registry.py [list | publish [notes] | activate vNNNN] ---
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "publish":
+        version = publish_model(notes=" ".join(sys.argv[2:]) or None)
+        print(f"✅ Published {version} (activate with: python model_registry.py activate {version})")
+    elif command == "activate":
+        manager = ModelManager()
+        if not manager.activate(sys.argv[2], background=False):
+            sys.exit(1)
+    else:
+        live = current_version()
+        for v in list_versions():
+            print(f"{'*' if v == live else ' '} {v}  {read_manifest(v)['created_at']}")
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import datetime
+import threading
+import numpy as np
+
+FEEDBACK_FILE = os.environ.get("DIETVEDA_FEEDBACK_FILE", "feedback.jsonl")
+SNAPSHOT_FILE = os.environ.get("DIETVEDA_FEEDBACK_SNAPSHOT", "feedback_counts.npz")
+# The forest's probabilities for a profile count as this many confirmations of it;
+# feedback on that exact profile needs as many confirmations to weigh as much
+PRIOR_STRENGTH = 20
+
+
+class FeedbackStore:
+    """
+    Append-only JSON-lines log of confirmed diagnoses. Readers keep a byte
+    offset, so each update only reads what was appended since the last one.
+    """
+    def __init__(self, path=FEEDBACK_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, profile, dosha):
+        record = {"profile": profile, "dosha": dosha,
+                  "at": datetime.datetime.now().isoformat(timespec="seconds")}
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def read_since(self, offset):
+        """(records appended after `offset`, new offset). Stops before a half-written last line."""
+        if not os.path.exists(self.path):
+            return [], offset
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return records, offset + end
+
+
+class OnlineLearner:
+    """
+    Learns from confirmed diagnoses without retraining.
+
+    Feedback is counted per quiz profile: one row of class counts for each
+    entry of the predictor's table. A profile's served probabilities are a
+    Dirichlet posterior with the forest's probabilities as prior pseudo-counts,
+    (prior_strength * forest + counts) / (prior_strength + n), so feedback
+    only moves the profiles it was given for and every other profile keeps
+    the forest's answer exactly. New feedback only adds to the counts.
+    """
+    def __init__(self, brain, store=None, snapshot_file=SNAPSHOT_FILE, prior_strength=PRIOR_STRENGTH):
+        self.store = store or FeedbackStore()
+        self.snapshot_file = snapshot_file
+        self.prior_strength = prior_strength
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"feedback_rows": 0, "updates": 0, "last_update_ms": None,
+                      "rows_changed": 0, "profiles_with_feedback": 0}
+        self._vocab = None
+        self.attach(brain)
+
+    # --- Model binding ---
+    def attach(self, brain):
+        """Bind to a (new) predictor, e.g. after a model version swap, and re-apply the feedback."""
+        with self._lock:
+            self.brain = brain
+            self.classes = list(brain.dosha_classes)
+            self._class_index = {c: i for i, c in enumerate(self.classes)}
+            vocab = [list(brain._codes[f]) for f in brain.features]
+            if vocab != self._vocab:
+                self._vocab = vocab
+                self._reset_counts()
+                self._load_snapshot()
+            self._catch_up(force=True)
+
+    def _reset_counts(self):
+        self.offset = 0
+        self.profile_counts = np.zeros((len(self.brain._grid), len(self.classes)))
+
+    def _load_snapshot(self):
+        # Counts + byte offset saved by the last update: a restart only reads newer feedback
+        if not os.path.exists(self.snapshot_file):
+            return
+        with np.load(self.snapshot_file, allow_pickle=False) as snap:
+            if "profile_counts" not in snap.files or json.loads(str(snap["vocab"])) != [self._vocab, self.classes]:
+                return  # older format, different questionnaire or classes: rebuild from the log
+            self.offset = int(snap["offset"])
+            self.profile_counts = snap["profile_counts"]
+
+    def _save_snapshot(self):
+        tmp = self.snapshot_file + ".tmp.npz"
+        np.savez(tmp, offset=self.offset, profile_counts=self.profile_counts,
+                 vocab=json.dumps([self._vocab, self.classes]))
+        os.replace(tmp, self.snapshot_file)
+
+    # --- Feedback ---
+    def label_weights(self, dosha):
+        """'Vata' -> {Vata: 1}; a confirmed dual dosha 'Vata-Pitta' counts half for each."""
+        parts = [p.strip().capitalize() for p in str(dosha).split("-") if p.strip()]
+        if not parts or len(parts) > 2 or any(p not in self._class_index for p in parts):
+            raise ValueError(f"Unknown dosha '{dosha}'")
+        return {self._class_index[p]: 1 / len(parts) for p in parts}
+
+    def record(self, profile, dosha):
+        """Validate and append one confirmed diagnosis (applied on the next update)."""
+        self.brain._lookup_index(profile)  # raises ValueError for a bad profile
+        self.label_weights(dosha)
+        self.store.append({f: profile[f] for f in self.brain.features}, dosha)
+
+    def update(self):
+        """Fold in feedback appended since the last update and refresh the predictor's table."""
+        with self._lock:
+            return self._catch_up()
+
+    def _catch_up(self, force=False):
+        start = time.perf_counter()
+        if self.store.size() < self.offset:
+            self._reset_counts()  # the log was truncated or replaced: replay it
+        records, offset = self.store.read_since(self.offset)
+        if records:
+            self._add(records)
+            self.offset = offset
+            self._save_snapshot()
+        if (records or force) and self.profile_counts.any():
+            changed = self.brain.refresh_table(self.blended_probs())
+            self.stats.update(updates=self.stats["updates"] + 1, rows_changed=int(changed),
+                              last_update_ms=round((time.perf_counter() - start) * 1000, 3))
+        self.stats.update(feedback_rows=int(round(self.profile_counts.sum())),
+                          profiles_with_feedback=int(self.profile_counts.any(axis=1).sum()))
+        return len(records)
+
+    def _add(self, records):
+        for record in records:
+            try:
+                weights = self.label_weights(record["dosha"])
+                index = self.brain._lookup_index(record["profile"])
+            except (KeyError, TypeError, ValueError):
+                continue  # e.g. a value the current questionnaire no longer has
+            for cls, w in weights.items():
+                self.profile_counts[index, cls] += w
+
+    # --- Blending ---
+    def blended_probs(self):
+        """Per-profile posterior; profiles without feedback keep the forest's probabilities exactly."""
+        forest = self.brain._forest_probs
+        n = self.profile_counts.sum(axis=1, keepdims=True)
+        posterior = (self.prior_strength * forest + self.profile_counts) / (self.prior_strength + n)
+        return np.where(n > 0, posterior, forest)
+
+    # --- Background schedule ---
+    def start(self, interval=30.0):
+        """Apply new feedback every `interval` seconds on a daemon thread."""
+        if self._thread is not None:
+            return self._thread
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.update()
+                except Exception as e:
+                    print(f"⚠️ Online learning update failed: {e}")
+
+        self._thread = threading.Thread(target=loop, name="online-learner", daemon=True)
+        self._thread.start()
+        return self._thread
@@ -1,27 +1,356 @@
+import os
+import json
+import math
 import pandas as pd
 import joblib
 import numpy as np
+from collections import namedtuple
+
+MODEL_FILE = 'dietveda_complex_model.pkl'
+ENCODERS_FILE = 'dietveda_encoders.pkl'
+COMPILED_MODEL_DIR = 'dietveda_compiled_model'
+
+# Everything predict()/next_question() serve from, replaced as one object by refresh_table
+ServedTables = namedtuple("ServedTables", "table probs quiz explanations")
+
+
+class FixedEncoder:
+    """Read-only stand-in for a fitted LabelEncoder (just the saved vocabulary)."""
+    def __init__(self, classes):
+        self.classes_ = np.array(classes, dtype=object)
+        self._codes = {v: i for i, v in enumerate(classes)}
+
+    def transform(self, values):
+        try:
+            return np.array([self._codes[v] for v in values], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e}")
+
+
+class CompiledForest:
+    """
+    NumPy evaluator for the flattened forest exported by trian_brain.py.
+    The node arrays are memory-mapped, so loading only opens a few files;
+    a batch walks all trees at once for max_depth steps.
+    """
+    def __init__(self, path=COMPILED_MODEL_DIR, mmap=True):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        mode = 'r' if mmap else None
+        for name in ("feature", "threshold", "left", "right", "value", "roots"):
+            setattr(self, name, np.load(os.path.join(path, name + ".npy"), mmap_mode=mode))
+
+        self.feature_names_in_ = np.array(self.meta["features"], dtype=object)
+        self.classes_ = np.array(self.meta["classes"])
+        self.max_depth = self.meta["max_depth"]
+        self.encoders = {col: FixedEncoder(classes) for col, classes in self.meta["encoders"].items()}
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        # Quiz answers repeat a lot: walk each distinct profile once
+        X, inverse = np.unique(X, axis=0, return_inverse=True)
+        rows = np.arange(len(X))[:, None]
+        # One walker per (row, tree); leaves loop onto themselves
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1)[inverse.ravel()]
+
 
 class DietVedaAI:
-    def __init__(self):
-        # Load the pre-trained brain
+    def __init__(self, model_dir=""):
+        # Load the pre-trained brain (compiled arrays if fresh, else the pickles)
+        # `model_dir` is a model registry version directory; "" means the working directory
+        self.model_dir = model_dir
+        self.version = None
+        model_file = os.path.join(model_dir, MODEL_FILE)
+        compiled_dir = os.path.join(model_dir, COMPILED_MODEL_DIR)
         try:
-            self.model = joblib.load('dietveda_complex_model.pkl')
-            self.encoders = joblib.load('dietveda_encoders.pkl')
+            if self._compiled_is_fresh(compiled_dir, model_file):
+                self.model = CompiledForest(compiled_dir)
+                self.encoders = self.model.encoders
+            else:
+                self.model = joblib.load(model_file)
+                self.encoders = joblib.load(os.path.join(model_dir, ENCODERS_FILE))
             self.dosha_classes = self.encoders['dosha'].classes_
         except FileNotFoundError:
             raise Exception("❌ Model not found! Run train_brain.py first.")
 
-    def predict(self, user_profile):
+        # Quiz features in the order the model was trained on
+        self.features = list(getattr(self.model, 'feature_names_in_',
+                                     [f for f in self.encoders if f != 'dosha']))
+        self._build_lookup_table()
+
+    @staticmethod
+    def _compiled_is_fresh(compiled_dir, model_file):
+        # A compiled model older than the pickle belongs to a previous training run
+        meta = os.path.join(compiled_dir, "meta.json")
+        if not os.path.exists(meta):
+            return False
+        return not os.path.exists(model_file) or os.path.getmtime(meta) >= os.path.getmtime(model_file)
+
+    def _build_lookup_table(self):
+        """
+        Run the forest once over every possible answer combination (a few
+        hundred) and keep the finished result dicts, so predict() is a lookup.
+        """
+        self._codes = {f: {v: i for i, v in enumerate(self.encoders[f].classes_)} for f in self.features}
+        shape = [len(self.encoders[f].classes_) for f in self.features]
+        self._strides = np.cumprod([1] + shape[:0:-1])[::-1]
+
+        # Every encoded profile, in flat (row-major) order
+        grid = np.stack(np.unravel_index(np.arange(np.prod(shape)), shape), axis=1)
+        probs = self.model.predict_proba(pd.DataFrame(grid, columns=self.features))
+        self._grid = grid
+        self._forest_probs = probs
+        table = [self._format_result(p) for p in probs]
+        quiz, means = self._build_quiz_table(table, probs)
+        self._served = ServedTables(table, probs, quiz, self._build_explanations(means, quiz[1]))
+
+    def refresh_table(self, probs):
+        """
+        Swap in new class probabilities for the precomputed table (e.g. after
+        online learning). Only rows whose probabilities changed are re-formatted.
+        Returns the number of rows that changed.
+        """
+        served = self._served
+        changed = np.flatnonzero(np.any(probs != served.probs, axis=1))
+        table = list(served.table)
+        for i in changed:
+            table[i] = self._format_result(probs[i])
+        quiz, means = self._build_quiz_table(table, probs)
+        explanations = self._build_explanations(means, quiz[1])
+        # One attribute store: a reader that took self._served once sees all old or all new
+        self._served = ServedTables(table, probs, quiz, explanations)
+        return len(changed)
+
+    def _build_quiz_table(self, table, probs):
+        """
+        Precomputes the adaptive questionnaire for every partial answer state
+        (each question unanswered or answered one way). A state is "done" once
+        all profiles still consistent with it share the same predicted dosha
+        (which also fixes single vs dual). Otherwise the next question is the
+        one that minimizes the expected number of further questions (exact, by
+        dynamic programming from full profiles backwards), with ties broken by
+        the lowest expected entropy of the outcome.
+        """
+        sizes = [len(self._codes[f]) for f in self.features]
+        n_features = len(sizes)
+
+        # 1. Every state as digits (0 = unanswered, k + 1 = answer k), mixed radix
+        state_shape = [n + 1 for n in sizes]
+        strides = np.cumprod([1] + state_shape[:0:-1])[::-1]
+        digits = np.stack(np.unravel_index(np.arange(np.prod(state_shape)), state_shape), axis=1)
+
+        # 2. Which full profiles each state is consistent with, and their outcome counts
+        consistent = np.ones((len(digits), len(self._grid)), dtype=bool)
+        for f in range(n_features):
+            consistent &= (digits[:, f, None] == 0) | (digits[:, f, None] == self._grid[None, :, f] + 1)
+        labels, outcome = np.unique([r["dosha"] for r in table], return_inverse=True)
+        counts = consistent.astype(np.float64) @ np.eye(len(labels))[outcome.ravel()]
+        totals = counts.sum(axis=1)
+        share = counts / totals[:, None]
+        entropy = -np.sum(np.where(share > 0, share * np.log2(np.where(share > 0, share, 1)), 0), axis=1)
+        done = (counts > 0).sum(axis=1) == 1
+
+        # 3. Expected questions still needed, deepest states first
+        cost = np.zeros(len(digits))
+        next_question = np.full(len(digits), -1, dtype=np.int8)
+        answered = (digits > 0).sum(axis=1)
+        for level in range(n_features - 1, -1, -1):
+            states = np.flatnonzero((answered == level) & ~done)
+            best = np.full((len(states), 2), np.inf)  # (expected cost, expected entropy)
+            for f in range(n_features):
+                open_ = digits[states, f] == 0
+                children = states[:, None] + (np.arange(sizes[f]) + 1)[None, :] * strides[f]
+                children = np.where(open_[:, None], children, states[:, None])  # answered: unused
+                weight = totals[children] / totals[states][:, None]
+                f_cost = 1 + np.sum(weight * cost[children], axis=1)
+                f_entropy = np.sum(weight * entropy[children], axis=1)
+                better = open_ & ((f_cost < best[:, 0] - 1e-12) |
+                                  ((np.abs(f_cost - best[:, 0]) <= 1e-12) & (f_entropy < best[:, 1])))
+                best[better] = np.stack([f_cost, f_entropy], axis=1)[better]
+                next_question[states[better]] = f
+            cost[states] = best[:, 0]
+
+        # 4. Final results where the quiz can stop (breakdown = mean over the remaining profiles)
+        means = (consistent.astype(np.float64) @ probs) / totals[:, None]
+        firsts = np.argmax(consistent, axis=1)
+        finals = {}
+        for state in np.flatnonzero(done):
+            mean, first = means[state], table[firsts[state]]
+            finals[int(state)] = {
+                "type": first["type"],
+                "dosha": first["dosha"],
+                "confidence": f"{int(mean.max() * 100)}%",
+                "breakdown": dict(zip(self.dosha_classes, mean)),
+            }
+        return (table, strides, next_question, cost, finals), means
+
+    def _build_explanations(self, means, state_strides):
+        """
+        Precomputes exact Shapley values of every answer for every profile. A
+        coalition of answered questions is worth the mean class probabilities
+        over all profiles sharing those answers (the quiz table's state
+        means), so the contributions plus the all-profile baseline add up
+        exactly to the served probabilities, whatever the model.
+        """
+        n = len(self.features)
+        masks = np.arange(1 << n)
+        in_mask = (masks[:, None] >> np.arange(n)[None, :]) & 1            # (subsets, features)
+
+        # State of (profile, subset): only the subset's answers are filled in
+        answer_digits = (self._grid + 1) * state_strides                  # (profiles, features)
+        states = answer_digits @ in_mask.T                                # (profiles, subsets)
+        values = means[states]                                            # (profiles, subsets, classes)
+
+        sizes = in_mask.sum(axis=1)
+        weights = np.array([math.factorial(k) * math.factorial(n - k - 1) / math.factorial(n) for k in range(n)])
+        contributions = np.zeros((len(self._grid), n, means.shape[1]))
+        for f in range(n):
+            without = masks[in_mask[:, f] == 0]
+            w = weights[sizes[without]][None, :, None]
+            contributions[:, f] = np.sum(w * (values[:, without | (1 << f)] - values[:, without]), axis=1)
+
+        baseline = dict(zip(self.dosha_classes, np.round(means[0], 4)))
+        explanations = []
+        for row, phi in enumerate(contributions):
+            primary = int(np.argmax(values[row, -1]))
+            factors = [{"question": feature,
+                        "answer": self.encoders[feature].classes_[self._grid[row, f]],
+                        "impact": round(float(phi[f, primary]), 4)}
+                       for f, feature in enumerate(self.features)]
+            explanations.append({
+                "baseline": baseline,
+                "contributions": {feature: dict(zip(self.dosha_classes, np.round(phi[f], 4)))
+                                  for f, feature in enumerate(self.features)},
+                # What pushed the result toward the top dosha, strongest first
+                "top_factors": sorted(factors, key=lambda x: -x["impact"]),
+            })
+        return explanations
+
+    def next_question(self, answers):
+        """
+        Adaptive quiz step: given the answers so far, either the most
+        informative question to ask next or the final result once more answers
+        could no longer change the predicted dosha. A table lookup per call.
+        """
+        _, strides, next_question, cost, finals = self._served.quiz
+
+        state = 0
+        for feature, stride in zip(self.features, strides):
+            if answers.get(feature) is None:
+                continue
+            code = self._encode(feature, answers[feature])
+            if code is None:
+                return {"error": f"Unknown value '{answers[feature]}' for {feature}"}
+            state += (code + 1) * stride
+
+        asked = sum(1 for f in self.features if answers.get(f) is not None)
+        if state in finals:
+            return {"done": True, "questions_asked": asked, "result": dict(finals[state])}
+        feature = self.features[next_question[state]]
+        return {
+            "done": False,
+            "questions_asked": asked,
+            "question": feature,
+            "options": list(self._codes[feature]),
+            "expected_remaining": round(float(cost[state]), 2),
+        }
+
+    def _encode(self, feature, value):
+        """Code of one answer, or None if it is not an option (lists and dicts included)."""
+        try:
+            return self._codes[feature].get(value)
+        except TypeError:  # unhashable, e.g. ["Dry"]
+            return None
+
+    def _lookup_index(self, user_profile):
+        """Flat table index of a profile; raises ValueError for unknown or missing answers."""
+        index = 0
+        for feature, stride in zip(self.features, self._strides):
+            if feature not in user_profile:
+                raise ValueError(f"Missing value for {feature}")
+            value = user_profile[feature]
+            code = self._encode(feature, value)
+            # Handle unseen labels safely
+            if code is None:
+                raise ValueError(f"Unknown value '{value}' for {feature}")
+            index += code * stride
+        return index
+
+    def predict(self, user_profile, explain=False):
         """
         Complex Prediction Logic:
         Returns not just the Dosha, but the Probability Distribution
         to detect 'Dual Doshas' (e.g., Vata-Pitta).
+        Served from the precomputed table (same answers as predict_forest).
+        With `explain`, also the precomputed per-answer contributions.
+        """
+        try:
+            index = self._lookup_index(user_profile)
+        except ValueError as e:
+            return {"error": str(e)}
+        served = self._served  # table and explanation from the same refresh
+        result = served.table[index]
+        result = dict(result, breakdown=dict(result["breakdown"]))
+        if explain:
+            result["explanation"] = served.explanations[index]
+        return result
+
+    def predict_batch(self, profiles):
+        """
+        Predict many quiz profiles at once (e.g. a clinic's bulk import).
+        Whole columns are encoded through vectorized value -> code maps and the
+        results gathered from the precomputed table. Returns one entry per
+        profile, in order; invalid rows get {"error": ...} without failing the batch.
         """
+        profiles = list(profiles)
+        is_dict = np.array([isinstance(p, dict) for p in profiles], dtype=bool)
+        df = pd.DataFrame([p if ok else {} for p, ok in zip(profiles, is_dict)],
+                          columns=self.features, index=range(len(profiles)))
+
+        index = np.zeros(len(profiles), dtype=np.int64)
+        valid = is_dict.copy()
+        codes = {}
+        for feature, stride in zip(self.features, self._strides):
+            try:
+                encoded = df[feature].map(self._codes[feature])
+            except TypeError:
+                # A list/dict answer somewhere in the column: encode value by value
+                encoded = df[feature].map(lambda v, f=feature: self._encode(f, v)).astype(float)
+            codes[feature] = encoded
+            ok = encoded.notna().to_numpy()
+            valid &= ok
+            index += np.where(ok, encoded.fillna(0).to_numpy(dtype=np.int64), 0) * stride
+
+        table = self._served.table
+        results = [None] * len(profiles)
+        for i in np.flatnonzero(valid):
+            entry = table[index[i]]
+            results[i] = dict(entry, breakdown=dict(entry["breakdown"]))
+        for i in np.flatnonzero(~valid):
+            results[i] = {"error": self._row_error(profiles[i], codes, i)}
+        return results
+
+    def _row_error(self, profile, codes, i):
+        # Same messages as predict() for the first bad answer in the row
+        if not isinstance(profile, dict):
+            return "Profile must be an object of quiz answers"
+        for feature in self.features:
+            if pd.isna(codes[feature].iat[i]):
+                if feature not in profile:
+                    return f"Missing value for {feature}"
+                return f"Unknown value '{profile[feature]}' for {feature}"
+
+    def predict_forest(self, user_profile):
+        """Reference path: run the forest on one profile (what predict() used to do per call)."""
         # 1. Preprocess Input
         processed_input = {}
         try:
-            for feature, value in user_profile.items():
+            for feature in self.features:
+                value = user_profile.get(feature)
                 encoder = self.encoders[feature]
                 # Handle unseen labels safely
                 if value not in encoder.classes_:
@@ -35,7 +364,9 @@ class DietVedaAI:
         # Output example: [0.1, 0.6, 0.3] (10% Kapha, 60% Pitta, 30% Vata)
         input_df = pd.DataFrame(processed_input)
         probs = self.model.predict_proba(input_df)[0]
-        
+        return self._format_result(probs)
+
+    def _format_result(self, probs):
         # Map probabilities to Dosha names
         dosha_probs = dict(zip(self.dosha_classes, probs))
         
@@ -1,39 +1,673 @@
+import os
 import sqlite3
 import datetime
+import threading
+import atexit
+import queue
+import time
+from contextlib import contextmanager
 
-class ProgressDB:
-    def __init__(self):
-        self.conn = sqlite3.connect("progress.db")
-        self.create_table()
+# DIETVEDA_PROGRESS_DB points the server (and the test suite) at another file
+DB_PATH = os.environ.get("DIETVEDA_PROGRESS_DB", "progress.db")
+# Owner of rows saved before progress became per-user, and of anonymous saves
+DEFAULT_USER = "default"
 
-    def create_table(self):
-        query = """
-        CREATE TABLE IF NOT EXISTS progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT ,
-            dosha TEXT,
-            score INTEGER
+# Applied to every new connection. WAL lets readers run alongside the writer;
+# synchronous=NORMAL is durable across app crashes in WAL mode (fsync at checkpoints).
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # 16 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Write-behind defaults: rows per group commit, max wait before a partial batch is
+# committed (seconds), and how many rows may queue before save_score() blocks
+WRITER_BATCH_SIZE = 500
+WRITER_FLUSH_INTERVAL = 0.05
+WRITER_MAX_QUEUE = 10000
+# Errors raised by a row's own values; the writer drops just that row for these
+ROW_ERRORS = (sqlite3.InterfaceError, sqlite3.ProgrammingError, sqlite3.IntegrityError,
+              TypeError, ValueError, OverflowError)
+
+# Retention: raw saves and daily rollup rows are kept for at least this many days;
+# older whole months are compacted into monthly_progress (see compact_history)
+RAW_RETENTION_DAYS = 90
+# How often the server's background compaction runs (seconds)
+COMPACTION_INTERVAL = 24 * 3600
+
+# Recomputes daily_progress from the raw rows. With MAX(id), SQLite takes the bare
+# `dosha` column from the day's newest row, which is the rollup's last_dosha.
+ROLLUP_BACKFILL = """
+    INSERT INTO daily_progress (user_id, date, score_sum, score_count, last_dosha)
+        SELECT user_id, date, score_sum, score_count, last_dosha FROM (
+            SELECT user_id, date, TOTAL(score) AS score_sum, COUNT(score) AS score_count,
+                   dosha AS last_dosha, MAX(id)
+            FROM progress WHERE date IS NOT NULL GROUP BY user_id, date
         );
-        """
-        self.conn.execute(query)
-        self.conn.commit()
+"""
+
+# Schema history: MIGRATIONS[i] upgrades a database from user_version i to i + 1
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT ,
+        dosha TEXT,
+        score INTEGER
+    );
+    """,
+    # 2: per-user history; dates become sortable YYYYMMDD integers; (user_id, date) index
+    """
+    CREATE TABLE progress_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL DEFAULT 'default',
+        date INTEGER,
+        dosha TEXT,
+        score INTEGER
+    );
+    INSERT INTO progress_new (id, user_id, date, dosha, score)
+        SELECT id, 'default', CAST(strftime('%Y%m%d', date) AS INTEGER), dosha, score FROM progress;
+    DROP TABLE progress;
+    ALTER TABLE progress_new RENAME TO progress;
+    CREATE INDEX idx_progress_user_date ON progress (user_id, date);
+    """,
+    # 3: per-user daily rollup, kept current by insert_rows() and filled from the history here
+    """
+    CREATE TABLE daily_progress (
+        user_id TEXT NOT NULL,
+        date INTEGER NOT NULL,
+        score_sum REAL NOT NULL DEFAULT 0,
+        score_count INTEGER NOT NULL DEFAULT 0,
+        last_dosha TEXT,
+        PRIMARY KEY (user_id, date)
+    ) WITHOUT ROWID;
+    """ + ROLLUP_BACKFILL,
+    # 4: archive tier — one row per user per compacted month
+    """
+    CREATE TABLE monthly_progress (
+        user_id TEXT NOT NULL,
+        month INTEGER NOT NULL,
+        score_sum REAL NOT NULL DEFAULT 0,
+        score_count INTEGER NOT NULL DEFAULT 0,
+        days_tracked INTEGER NOT NULL DEFAULT 0,
+        last_dosha TEXT,
+        PRIMARY KEY (user_id, month)
+    ) WITHOUT ROWID;
+    """,
+    # 5: which days of the month are archived (bit d-1 = day d) and the newest of them,
+    # so compacting a late save into an archived month counts each day once
+    """
+    ALTER TABLE monthly_progress ADD COLUMN day_bits INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE monthly_progress ADD COLUMN last_date INTEGER;
+    """,
+]
+
+
+class ConnectionPool:
+    """
+    Process-wide SQLite connections for one database file.
+
+    A thread checks a connection out for the duration of an operation (nested
+    uses in the same thread get the same one) and hands it back afterwards,
+    so the short-lived request threads of the Flask server reuse a few warm
+    connections instead of opening one per request. Pragmas and the schema
+    migration run once, when the pool first opens the file.
+    """
+    def __init__(self, path=DB_PATH, max_idle=8):
+        self.path = path
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = []
+        self._open = set()
+        self._local = threading.local()
+        self._migrated = False
+        self.stats = {"opened": 0, "reused": 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._open.add(conn)
+            self.stats["opened"] += 1
+        if not self._migrated:
+            with self._lock:
+                if not self._migrated:
+                    migrate(conn)
+                    self._migrated = True
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """`with pool.connection() as conn:` — this thread's connection until the block ends."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            yield conn  # nested use in the same thread
+            return
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.stats["reused"] += 1
+        if conn is None:
+            conn = self._connect()
+
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            if conn.in_transaction:
+                conn.rollback()  # never hand out a connection mid-transaction
+            with self._lock:
+                if len(self._idle) < self.max_idle and conn in self._open:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                self._discard(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open.discard(conn)
+        conn.close()
+
+    def close_all(self):
+        """Checkpoint the WAL and close every connection (called at interpreter exit)."""
+        with self._lock:
+            conns, self._open, self._idle = list(self._open), set(), []
+        for i, conn in enumerate(conns):
+            try:
+                if i == 0:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+class WriteBehindWriter:
+    """
+    Takes score saves off the request path.
+
+    save_score() only puts the row on a bounded in-memory queue; one writer
+    thread drains it and commits whole batches in a single transaction
+    (group commit), every `flush_interval` seconds or as soon as `batch_size`
+    rows are waiting. A full queue blocks the caller (backpressure) instead of
+    dropping data, close() drains everything before exit, and readers can wait
+    for one user's pending rows so they always see their own writes.
+    """
+    def __init__(self, pool, max_queue=WRITER_MAX_QUEUE, batch_size=WRITER_BATCH_SIZE,
+                 flush_interval=WRITER_FLUSH_INTERVAL):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}                      # user_id -> rows queued but not committed
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "failed_rows": 0,
+                      "last_batch_rows": 0, "last_flush_ms": None, "max_flush_ms": 0.0}
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one (user_id, date, dosha, score) row; blocks only while the queue is full."""
+        if self._closed:
+            raise RuntimeError("progress writer is closed")
+        with self._cond:
+            self._pending[row[0]] = self._pending.get(row[0], 0) + 1
+            self.stats["enqueued"] += 1
+        self._queue.put(row)
+
+    def wait_for_user(self, user_id, timeout=5.0):
+        """Block until every row queued for `user_id` is committed (read-your-writes)."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending.get(user_id), timeout)
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued so far is committed."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending, timeout)
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._closed:
+                    return
+                continue
+            if first is None:  # close() sentinel: drain what's left, then stop
+                self._drain_remaining()
+                return
+
+            # Group commit: wait up to one interval for more rows, at most batch_size
+            batch, stop = [first], False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                batch.append(row)
+            self._write_safely(batch)
+            if stop:
+                self._drain_remaining()
+                return
+
+    def _drain_remaining(self):
+        batch = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if row is not None:
+                batch.append(row)
+        for i in range(0, len(batch), self.batch_size):
+            self._write_safely(batch[i:i + self.batch_size])
+
+    def _write_safely(self, batch):
+        # Last line of defence: the writer thread outlives any error, or later saves would hang
+        try:
+            self._write(batch)
+        except Exception as e:
+            print(f"⚠️ Progress writer failed on a batch of {len(batch)} rows: {e}")
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        error = self._commit(batch)
+        failed = []
+        if error is not None:
+            # Don't let one bad row cost the rest of the group: commit row by row
+            failed = [row for row in batch if self._commit([row]) is not None]
+            print(f"⚠️ Progress writer dropped {len(failed)} of {len(batch)} rows: {error}")
+
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._cond:
+            for row in batch:
+                left = self._pending[row[0]] - 1
+                if left:
+                    self._pending[row[0]] = left
+                else:
+                    del self._pending[row[0]]
+            self.stats.update(written=self.stats["written"] + len(batch) - len(failed),
+                              failed_rows=self.stats["failed_rows"] + len(failed),
+                              batches=self.stats["batches"] + 1,
+                              last_batch_rows=len(batch), last_flush_ms=round(elapsed, 3),
+                              max_flush_ms=round(max(self.stats["max_flush_ms"], elapsed), 3))
+            self._cond.notify_all()
+
+    def _commit(self, rows):
+        """Insert `rows` in one transaction; returns None, or the error it gave up on."""
+        attempt = 0
+        while True:
+            try:
+                with self.pool.connection() as conn, conn:
+                    insert_rows(conn, rows)
+                return None
+            except sqlite3.OperationalError as e:
+                # Locked or busy (e.g. during a VACUUM): wait it out instead of dropping
+                # rows; only give up when closing, so shutdown can't hang on it
+                if self._closed and attempt >= 2:
+                    return e
+            except ROW_ERRORS as e:
+                return e  # the values themselves: retrying can't help
+            except Exception as e:  # anything raised here must not kill the writer thread
+                if attempt >= 2:
+                    return e
+            attempt += 1
+            time.sleep(min(0.1 * attempt, 1.0))
+
+    def metrics(self):
+        with self._cond:
+            return dict(self.stats, queue_depth=self._queue.qsize(),
+                        pending_users=len(self._pending))
+
+    def close(self, timeout=30.0):
+        """Stop accepting rows, commit everything still queued, and stop the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._drain_remaining()  # rows that raced in behind the sentinel
+
+
+def insert_rows(conn, rows):
+    """
+    Insert (user_id, date, dosha, score) rows and fold them into daily_progress.
+    The caller owns the transaction, so the raw rows and the rollup always
+    commit (or roll back) together.
+    """
+    conn.executemany("INSERT INTO progress (user_id, date, dosha, score) VALUES (?, ?, ?, ?)", rows)
+
+    # One upsert per (user, day) of the batch; later rows win last_dosha, like ORDER BY id
+    days = {}
+    for user_id, date, dosha, score in rows:
+        day = days.setdefault((user_id, date), [0.0, 0, None])
+        if score is not None:
+            day[0] += score
+            day[1] += 1
+        day[2] = dosha
+    conn.executemany("""
+        INSERT INTO daily_progress (user_id, date, score_sum, score_count, last_dosha)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, date) DO UPDATE SET
+            score_sum = score_sum + excluded.score_sum,
+            score_count = score_count + excluded.score_count,
+            last_dosha = excluded.last_dosha
+    """, [(user_id, date, *day) for (user_id, date), day in days.items()])
+
+
+def rebuild_daily_rollup(path=DB_PATH):
+    """
+    Backfill: recompute daily_progress from the raw progress rows in one
+    transaction. Migration 3 already does this when an old database is first
+    opened; this repairs a rollup that was edited or restored separately.
+    Returns (raw rows, daily rows).
+    """
+    # The write lock serializes us with the writer thread: each of its batches
+    # lands either before the rebuild (and is counted) or after it (and is added)
+    with get_pool(path).connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM daily_progress")
+            conn.execute(ROLLUP_BACKFILL)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        raw = conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0]
+        daily = conn.execute("SELECT COUNT(*) FROM daily_progress").fetchone()[0]
+    return raw, daily
+
+
+def compact_history(path=DB_PATH, horizon_days=RAW_RETENTION_DAYS, today=None, batch_users=50):
+    """
+    Tiered retention. Whole months that ended more than `horizon_days` ago
+    move from the hot tables (raw `progress` saves and `daily_progress`) into
+    one `monthly_progress` row per user and month, so the hot tables only ever
+    hold the last few months however long a user has been tracking. Users are
+    processed `batch_users` at a time, each batch in its own short
+    transaction, so the write-behind writer is never locked out for long and
+    an interrupted run simply resumes next time.
+    """
+    if horizon_days < 31:
+        raise ValueError("horizon_days must cover the 30-day analytics window (at least 31)")
+    oldest = (today or datetime.date.today()) - datetime.timedelta(days=horizon_days)
+    cutoff = day_to_int(oldest.replace(day=1))
+    stats = {"cutoff": int_to_day(cutoff), "users": 0, "raw_rows": 0, "daily_rows": 0}
+    start = time.perf_counter()
+
+    with get_pool(path).connection() as conn:
+        users = [u for (u,) in conn.execute(
+            "SELECT DISTINCT user_id FROM daily_progress WHERE date < ?", (cutoff,))]
+        for i in range(0, len(users), batch_users):
+            params = [(u, cutoff) for u in users[i:i + batch_users]]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                _archive_months(conn, params)
+                daily = conn.executemany("DELETE FROM daily_progress WHERE user_id = ? AND date < ?", params).rowcount
+                raw = conn.executemany("DELETE FROM progress WHERE user_id = ? AND date < ?", params).rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            stats["users"] += len(params)
+            stats["daily_rows"] += daily
+            stats["raw_rows"] += raw
 
-    def save_score(self, dosha, score):
-        today = str(datetime.date.today())
-        query = "INSERT INTO progress (date, dosha, score) VALUES (?, ?, ?)"
-        self.conn.execute(query, (today, dosha, score))
-        self.conn.commit()
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
 
-    def get_last_30_days(self):
-        """Get all scores from the last 30 days"""
+
+def _archive_months(conn, params):
+    """
+    Fold the daily rows of `params` (user_id, cutoff) into monthly_progress.
+    A month may already be archived (a late save dated in it): days already
+    archived are not counted again, and last_dosha only moves to a newer day.
+    """
+    months = {}
+    for user_id, cutoff in params:
+        for date, score_sum, score_count, dosha in conn.execute(
+                "SELECT date, score_sum, score_count, last_dosha FROM daily_progress "
+                "WHERE user_id = ? AND date < ? ORDER BY date", (user_id, cutoff)):
+            month = months.setdefault((user_id, date // 100), [0.0, 0, 0, None, None])
+            month[0] += score_sum
+            month[1] += score_count
+            month[2] |= 1 << (date % 100 - 1)
+            month[3], month[4] = date, dosha  # ascending dates: the last row is the newest day
+
+    rows = []
+    for (user_id, month), (score_sum, score_count, bits, last_date, last_dosha) in months.items():
+        old = conn.execute(
+            "SELECT score_sum, score_count, days_tracked, day_bits, last_date, last_dosha "
+            "FROM monthly_progress WHERE user_id = ? AND month = ?", (user_id, month)).fetchone()
+        days_tracked = bin(bits).count("1")
+        if old:
+            old_sum, old_count, old_days, old_bits, old_last, old_dosha = old
+            score_sum += old_sum
+            score_count += old_count
+            days_tracked = old_days + bin(bits & ~old_bits).count("1")
+            bits |= old_bits
+            if old_last is not None and old_last > last_date:
+                last_date, last_dosha = old_last, old_dosha
+        rows.append((user_id, month, score_sum, score_count, days_tracked, bits, last_date, last_dosha))
+    conn.executemany("""
+        INSERT OR REPLACE INTO monthly_progress
+            (user_id, month, score_sum, score_count, days_tracked, day_bits, last_date, last_dosha)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def vacuum(path=DB_PATH):
+    """Give the space freed by compaction back to the filesystem (rewrites the whole file)."""
+    with get_pool(path).connection() as conn:
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def day_to_int(day):
+    """datetime.date(2025, 3, 9) -> 20250309 (sorts like the date itself)"""
+    return day.year * 10000 + day.month * 100 + day.day
+
+def int_to_day(value):
+    """20250309 -> '2025-03-09'"""
+    return f"{value // 10000:04d}-{value // 100 % 100:02d}-{value % 100:02d}"
+
+
+def migrate(conn):
+    """
+    Bring the schema up to date, one numbered step at a time (tracked in
+    PRAGMA user_version). Each step is its own write-locked transaction, so a
+    crash or a second process never sees a half-applied migration.
+    """
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.rollback()
+            return
+        try:
+            # executescript would commit first; run the statements inside our transaction
+            for statement in MIGRATIONS[version].split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+_pools = {}
+_writers = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path=DB_PATH):
+    """The one ConnectionPool of this process for `path`."""
+    pool = _pools.get(path)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(path, ConnectionPool(path))
+    return pool
+
+def get_writer(path=DB_PATH, **options):
+    """
+    The one WriteBehindWriter of this process for `path`, started on first use.
+    `options` (batch_size, flush_interval, max_queue) apply to that first call.
+    """
+    writer = _writers.get(path)
+    if writer is None:
+        pool = get_pool(path)
+        with _pools_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = _writers[path] = WriteBehindWriter(pool, **options)
+    return writer
+
+def writer_metrics(path=DB_PATH):
+    writer = _writers.get(path)
+    return writer.metrics() if writer else None
+
+_compactions = {}
+
+def start_compaction(path=DB_PATH, horizon_days=RAW_RETENTION_DAYS, interval=COMPACTION_INTERVAL):
+    """Run compact_history() now and then every `interval` seconds on a daemon thread."""
+    if path in _compactions:
+        return _compactions[path]["thread"]
+
+    def loop():
+        while True:
+            try:
+                _compactions[path]["last_run"] = compact_history(path, horizon_days)
+            except Exception as e:
+                print(f"⚠️ Progress compaction failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="progress-compaction", daemon=True)
+    _compactions[path] = {"thread": thread, "horizon_days": horizon_days, "last_run": None}
+    thread.start()
+    return thread
+
+def compaction_metrics(path=DB_PATH):
+    state = _compactions.get(path)
+    return {"horizon_days": state["horizon_days"], "last_run": state["last_run"]} if state else None
+
+@atexit.register
+def close_all_pools():
+    # Writers first: queued scores are committed before the connections go away
+    for writer in list(_writers.values()):
+        writer.close()
+    for pool in list(_pools.values()):
+        pool.close_all()
+
+
+class ProgressDB:
+    def __init__(self, path=DB_PATH):
+        # Cheap: connections come from the shared pool, saves go to the shared writer
+        self.pool = get_pool(path)
+        self.writer = get_writer(path)
+
+    def save_score(self, dosha, score, user_id=DEFAULT_USER, day=None, wait=False):
+        """Queue a score for the background writer; `wait` blocks until it is committed."""
+        # Checked here, not in the writer thread, so a bad row never reaches a shared batch
+        if not isinstance(user_id, str) or not isinstance(dosha, str):
+            raise ValueError("user_id and dosha must be strings")
+        if score is not None:
+            # The column is INTEGER and the rollup adds scores up: "5" from a form becomes 5
+            try:
+                if isinstance(score, bool):
+                    raise TypeError
+                score = int(score)
+            except (TypeError, ValueError):
+                raise ValueError(f"score must be a number, got {score!r}") from None
+        row = (user_id, day_to_int(day or datetime.date.today()), dosha, score)
+        self.writer.submit(row)
+        if wait:
+            self.writer.wait_for_user(user_id)
+
+    def get_last_30_days(self, user_id=DEFAULT_USER, days=30):
+        """
+        Get one user's scores from the last 30 (or `days`) days as ('YYYY-MM-DD', dosha, score).
+        Raw saves are only kept for RAW_RETENTION_DAYS; use get_daily_scores for longer ranges.
+        """
         today = datetime.date.today()
-        thirty_days_ago = today - datetime.timedelta(days=30)
-        
+        since = day_to_int(today - datetime.timedelta(days=days))
+
+        # Served by idx_progress_user_date: a range scan over this user's rows only
         query = """
-        SELECT date, dosha, score 
+        SELECT date, dosha, score
         FROM progress
-        WHERE date >= ?
-        ORDER BY date ASC;
+        WHERE user_id = ? AND date >= ?
+        ORDER BY date ASC, id ASC;
+        """
+        self.writer.wait_for_user(user_id)  # see this user's own queued saves
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, (user_id, since)).fetchall()
+        return [(int_to_day(date), dosha, score) for date, dosha, score in rows]
+
+    def get_daily_scores(self, user_id=DEFAULT_USER, days=30):
         """
-        cursor = self.conn.execute(query, (str(thirty_days_ago),))
-        return cursor.fetchall()
+        One row per tracked day of the last 30 (or `days`) days, oldest first, as
+        ('YYYY-MM-DD', average score, most recent dosha) — read from the daily
+        rollup, so at most `days` rows whatever the number of saves.
+
+        Long ranges (90, 365 days) reach past the retention horizon: each
+        archived month then contributes one row, its monthly average, dated
+        the first day of the month (or the first day of the range).
+        """
+        today = datetime.date.today()
+        since = day_to_int(today - datetime.timedelta(days=days - 1))
+
+        daily_query = """
+        SELECT date, score_sum / score_count, last_dosha
+        FROM daily_progress
+        WHERE user_id = ? AND date >= ? AND score_count > 0;
+        """
+        monthly_query = """
+        SELECT month, score_sum / score_count, last_dosha
+        FROM monthly_progress
+        WHERE user_id = ? AND month >= ? AND score_count > 0;
+        """
+        self.writer.wait_for_user(user_id)
+        with self.pool.connection() as conn:
+            by_day = {date: (score, dosha) for date, score, dosha in conn.execute(daily_query, (user_id, since))}
+            for month, score, dosha in conn.execute(monthly_query, (user_id, since // 100)):
+                by_day.setdefault(max(month * 100 + 1, since), (score, dosha))
+        return [(int_to_day(date), score, dosha) for date, (score, dosha) in sorted(by_day.items())]
+
+
+# --- CLI: python progress_db.py backfill [path] | compact [--horizon DAYS] [--vacuum] [path] ---
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Maintenance for the progress database")
+    parser.add_argument("command", choices=["backfill", "compact"])
+    parser.add_argument("path", nargs="?", default=DB_PATH)
+    parser.add_argument("--horizon", type=int, default=RAW_RETENTION_DAYS,
+                        help="compact: keep this many days of raw history")
+    parser.add_argument("--vacuum", action="store_true", help="compact: shrink the file afterwards")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "backfill":
+        raw, daily = rebuild_daily_rollup(args.path)
+        print(f"✅ Rebuilt daily_progress for {args.path}: {raw} raw rows -> {daily} daily rows "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        size = os.path.getsize(args.path) if os.path.exists(args.path) else 0
+        try:
+            stats = compact_history(args.path, args.horizon)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"📦 Archived history before {stats['cutoff']} for {stats['users']} users: "
+              f"{stats['raw_rows']} raw rows, {stats['daily_rows']} daily rows")
+        if args.vacuum:
+            vacuum(args.path)
+            print(f"🧹 {args.path}: {size / 1e6:.1f} MB -> {os.path.getsize(args.path) / 1e6:.1f} MB")
+        print(f"✅ Done in {time.perf_counter() - start:.2f}s")
@@ -1,13 +1,98 @@
 import pandas as pd
+import numpy as np
 import datetime
+import itertools
+import copy
+import time
+from dish_catalog import DishCatalog, get_catalog, refresh_catalog, DOSHAS
+
+RESULT_COLUMNS = ['dish_name', 'dish_type', 'season', 'score', 'ingredients']
+PLAN_MEALS = ("Breakfast", "Lunch", "Dinner")
+# Largest result list a caller can ask for
+MAX_K = 100
+
+def parse_k(value):
+    """
+    A result count from request input: 5 or "5" -> 5, capped at MAX_K.
+    Raises ValueError for negatives and anything that is not a whole number.
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"k must be a non-negative integer, got {value!r}")
+    try:
+        k = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"k must be a non-negative integer, got {value!r}") from None
+    if k < 0:
+        raise ValueError(f"k must be a non-negative integer, got {value!r}")
+    return min(k, MAX_K)
+
+def _top_k_rows(rows, scores, k):
+    """
+    The k best of `rows` by score in O(n) (no full sort). Ties at the cut-off
+    keep the earliest rows, so results don't depend on chunk boundaries.
+    """
+    if k <= 0:
+        return rows[:0]
+    if len(rows) <= k:
+        return rows
+    kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = rows[scores > kth]
+    ties = rows[scores == kth][:k - len(above)]
+    return np.concatenate([above, ties])
+
+def _overlap(a, b):
+    # Number of shared ingredients between two bitsets
+    return bin(a & b).count("1")
+
+def _plan_objective(plan, overlap_penalty):
+    """Total suitability minus a penalty for ingredients shared by consecutive days."""
+    total, prev_day = 0, 0
+    for day in plan:
+        day_bits = 0
+        for choice in day:
+            if choice is not None:
+                total += choice[1]
+                day_bits |= choice[2]
+        total -= overlap_penalty * _overlap(day_bits, prev_day)
+        prev_day = day_bits
+    return total
+
+def _count_value(counter):
+    # Read an itertools.count without advancing it
+    return next(copy.copy(counter))
+
 
 class DietRecommender:
+    """
+    Thread-safe: the loaded catalog is treated as immutable and every call keeps
+    its scores in local variables, so one instance can serve many request threads
+    without locks. Reloads and ranking rebuilds swap a single reference.
+    """
     def __init__(self, dishes_file):
-        # Load Data
-        self.df = pd.read_csv(dishes_file)
-        # Fill NaNs to prevent errors
-        self.df['avoids_for'] = self.df['avoids_for'].fillna('')
-        self.df['season'] = self.df['season'].fillna('All')
+        self.dishes_file = dishes_file
+        get_catalog(dishes_file)  # load (or join) the process-wide catalog up front
+
+        # Materialized rankings: ((snapshot, season), {(primary, secondary, meal) -> record list})
+        self._rankings = (None, {})
+        self._hits = itertools.count()
+        self._misses = itertools.count()
+        self._rebuilds = itertools.count()
+
+    @property
+    def _catalog(self):
+        return get_catalog(self.dishes_file)
+
+    @property
+    def df(self):
+        return self._catalog.df
+
+    @property
+    def cache_stats(self):
+        return {
+            "hits": _count_value(self._hits),
+            "misses": _count_value(self._misses),
+            "rebuilds": _count_value(self._rebuilds),
+        }
 
     def _get_season(self):
         """
@@ -26,10 +111,10 @@ class DietRecommender:
         The Core Algorithm: Assigns a 'Suitability Score' to every dish.
         """
         score = 0
-        
+
         suitable_list = row['dosha_suitable_for']
         avoids_list = row['avoids_for']
-        
+
         # 1. Safety Check (CRITICAL)
         # If it aggravates either dosha, kill the score (set to -100)
         if primary_dosha in avoids_list or (secondary_dosha and secondary_dosha in avoids_list):
@@ -38,10 +123,10 @@ class DietRecommender:
         # 2. Dosha Matching
         if primary_dosha in suitable_list:
             score += 10  # High priority
-            
+
         if secondary_dosha and secondary_dosha in suitable_list:
             score += 5   # Medium priority for secondary dosha
-            
+
         # 3. Tridoshic Bonus (Good for everyone)
         if "Kapha, Pitta, Vata" in suitable_list:
             score += 3
@@ -55,51 +140,286 @@ class DietRecommender:
 
         return score
 
-    def recommend(self, user_dosha, meal_type=None):
+    def _score_catalog(self, primary_dosha, secondary_dosha, current_season, catalog=None):
         """
-        Main function to get ranked recommendations.
-        user_dosha can be "Vata", "Pitta", or "Vata-Pitta"
+        Vectorized version of _calculate_score: returns the score of every dish
+        as one array, with identical results.
         """
+        catalog = catalog or self._catalog
+        suitable_p = catalog.membership(catalog.suitable, 'dosha_suitable_for', primary_dosha)
+        avoids = catalog.membership(catalog.avoids, 'avoids_for', primary_dosha)
+
+        scores = np.where(suitable_p, 10, 0) + np.where(catalog.tridoshic, 3, 0)
+
+        if secondary_dosha:
+            suitable_s = catalog.membership(catalog.suitable, 'dosha_suitable_for', secondary_dosha)
+            avoids = avoids | catalog.membership(catalog.avoids, 'avoids_for', secondary_dosha)
+            scores = scores + np.where(suitable_s, 5, 0)
+
+        # Seasonal Adjustment: +5 in season (or 'All'), -5 otherwise
+        in_season = catalog.all_seasons | catalog.membership(catalog.in_season, 'season', current_season)
+        scores = scores + np.where(in_season, 5, -5)
+
+        # Safety Check overrides everything else
+        return np.where(avoids, -100, scores).astype(np.int64)
+
+    def _split_dosha(self, user_dosha):
         # Handle Dual Doshas (e.g., "Vata-Pitta")
         if "-" in user_dosha:
             parts = user_dosha.split("-")
-            primary = parts[0]
-            secondary = parts[1]
-        else:
-            primary = user_dosha
-            secondary = None
+            return parts[0], parts[1]
+        return user_dosha, None
 
-        current_season = self._get_season()
-        
-        # Apply the Scoring Algorithm to every row
-        # We use a lambda function to apply logic row-by-row
-        self.df['score'] = self.df.apply(
-            lambda row: self._calculate_score(row, primary, secondary, current_season), 
-            axis=1
-        )
+    def recommend(self, user_dosha, meal_type=None, exclude_ingredients=None, require_ingredients=None):
+        """
+        Main function to get ranked recommendations.
+        user_dosha can be "Vata", "Pitta", or "Vata-Pitta"
+        exclude_ingredients / require_ingredients: list or comma-separated string (e.g. "ghee, paneer")
+        """
+        primary, secondary = self._split_dosha(user_dosha)
+        catalog = self._catalog
+        allowed = catalog.ingredients.filter_mask(exclude_ingredients, require_ingredients)
+        return self._rank(catalog, primary, secondary, self._get_season(), meal_type, allowed=allowed)
+
+    def _rank(self, catalog, primary, secondary, current_season, meal_type, scores=None, k=10, allowed=None):
+        # Apply the Scoring Algorithm to the whole catalog at once (per-call array, never stored on df)
+        if scores is None:
+            scores = self._score_catalog(primary, secondary, current_season, catalog)
 
         # Filter out "Dangerous" foods (Score < 0)
-        safe_foods = self.df[self.df['score'] > 0].copy()
+        keep = scores > 0
 
         # Filter by Meal Type if provided (e.g., "Breakfast")
         if meal_type:
-            safe_foods = safe_foods[safe_foods['dish_type'].str.lower() == meal_type.lower()]
+            keep &= catalog.meal_mask(meal_type)
+
+        # Ingredient filters (precomputed bitsets from the inverted index)
+        if allowed is not None:
+            keep &= allowed
+
+        safe_foods = catalog.take(np.flatnonzero(keep), [c for c in RESULT_COLUMNS if c != 'score'])
+        safe_foods.insert(RESULT_COLUMNS.index('score'), 'score', scores[keep])
 
         # Sort by Score (High to Low) -> The "Best" matches first
         ranked_foods = safe_foods.sort_values(by='score', ascending=False)
-        
-        return ranked_foods[['dish_name', 'dish_type', 'season', 'score', 'ingredients']].head(10)
+
+        return ranked_foods.head(k)
+
+    def recommend_all(self, user_dosha, k=10, exclude_ingredients=None, require_ingredients=None):
+        """
+        Score the catalog ONCE and return the top-k record lists for every meal
+        type plus an "All" list, e.g. {"Breakfast": [...], ..., "All": [...]}.
+        k is either one number for every list or a dict like {"Lunch": 5, "All": 20};
+        meals missing from the dict get 10. Counts go through parse_k (ValueError if invalid).
+        """
+        k = {meal: parse_k(v) for meal, v in k.items()} if isinstance(k, dict) else parse_k(k)
+        primary, secondary = self._split_dosha(user_dosha)
+        current_season = self._get_season()
+        catalog = self._current_catalog()
+        scores = self._score_catalog(primary, secondary, current_season, catalog)
+        allowed = catalog.ingredients.filter_mask(exclude_ingredients, require_ingredients)
+
+        def top_k(meal):
+            return k.get(meal, 10) if isinstance(k, dict) else k
+
+        meals = sorted(m for m in catalog.dish_types if m)
+        result = {}
+        for meal in meals + ["All"]:
+            meal_type = None if meal == "All" else meal
+            ranked = self._rank(catalog, primary, secondary, current_season, meal_type,
+                                scores=scores, k=top_k(meal), allowed=allowed)
+            result[meal] = ranked.to_dict(orient='records')
+        return result
+
+    def recommend_stream(self, user_dosha, meal_type=None, source=None, k=10, chunksize=100_000,
+                         exclude_ingredients=None, require_ingredients=None):
+        """
+        recommend() for catalogs larger than memory (e.g. partner dish CSVs).
+        Reads `source` (default: this recommender's CSV) in chunks, scores each
+        chunk vectorized and keeps only the running top-k, so memory stays flat
+        no matter how big the file is. Returns the same columns as recommend(),
+        indexed by row number; equal scores are ordered by catalog position.
+        """
+        k = parse_k(k)
+        primary, secondary = self._split_dosha(user_dosha)
+        current_season = self._get_season()
+        columns = [c for c in RESULT_COLUMNS if c != 'score']
+
+        best = pd.DataFrame(columns=RESULT_COLUMNS)
+        for chunk in pd.read_csv(source or self.dishes_file, chunksize=chunksize):
+            offset = chunk.index[0]
+            catalog = DishCatalog.from_frame(chunk)
+
+            scores = self._score_catalog(primary, secondary, current_season, catalog)
+            keep = scores > 0
+            if meal_type:
+                keep &= catalog.meal_mask(meal_type)
+            if exclude_ingredients or require_ingredients:
+                keep &= catalog.ingredients.filter_mask(exclude_ingredients, require_ingredients)
+
+            # Only the chunk's own top-k can make it into the overall top-k
+            rows = np.flatnonzero(keep)
+            rows = np.sort(_top_k_rows(rows, scores[rows], k))
+            candidates = catalog.take(rows, columns)
+            candidates.insert(RESULT_COLUMNS.index('score'), 'score', scores[rows])
+            candidates.index = candidates.index + offset
+
+            merged = candidates if best.empty else pd.concat([best, candidates])
+            order = np.lexsort((merged.index.to_numpy(), -merged['score'].to_numpy()))
+            best = merged.iloc[order[:k]]
+
+        return best
+
+    # ---------------------------------------------------------
+    # WEEKLY MEAL PLAN
+    # ---------------------------------------------------------
+    def plan_week(self, user_dosha, days=7, meals=PLAN_MEALS, max_repeats=1, overlap_penalty=2,
+                  pool_size=30, time_budget=0.05, exclude_ingredients=None, require_ingredients=None):
+        """
+        Build a days x meals plan that maximizes the suitability score while
+        limiting repeated dishes (at most `max_repeats` uses per dish, relaxed
+        only if a meal has too few safe dishes) and ingredient overlap between
+        consecutive days (`overlap_penalty` points per shared ingredient).
+
+        Greedy fill, then first-improvement local search over each meal's top
+        `pool_size` dishes until nothing improves or `time_budget` seconds pass.
+        Returns {"days": [{"day": 1, "Breakfast": record, ...}, ...], "score": ..., ...}
+        """
+        started = time.perf_counter()
+        deadline = started + time_budget
+        primary, secondary = self._split_dosha(user_dosha)
+        current_season = self._get_season()
+        catalog = self._current_catalog()
+        scores = self._score_catalog(primary, secondary, current_season, catalog)
+        allowed = catalog.ingredients.filter_mask(exclude_ingredients, require_ingredients)
+
+        # 1. Candidate pools: (row, score, ingredient bitset) from the same ranking as recommend()
+        pools = []
+        for meal in meals:
+            ranked = self._rank(catalog, primary, secondary, current_season, meal,
+                                scores=scores, k=pool_size, allowed=allowed)
+            pools.append([(int(row), int(score), catalog.ingredients.dish_bitset(row))
+                          for row, score in zip(ranked.index, ranked['score'])])
+        caps = [max(max_repeats, -(-days // len(pool))) if pool else 0 for pool in pools]
+
+        # 2. Greedy: best remaining dish per slot, penalizing overlap with the previous day
+        uses = {}
+        plan, prev_day = [], 0
+        for _ in range(days):
+            day, day_bits = [], 0
+            for pool, cap in zip(pools, caps):
+                options = [c for c in pool if uses.get(c[0], 0) < cap]
+                choice = max(options, key=lambda c: c[1] - overlap_penalty * _overlap(c[2], prev_day),
+                             default=None)
+                if choice is not None:
+                    uses[choice[0]] = uses.get(choice[0], 0) + 1
+                    day_bits |= choice[2]
+                day.append(choice)
+            plan.append(day)
+            prev_day = day_bits
+
+        # 3. Local search: swap single slots while the objective improves and time remains
+        best = _plan_objective(plan, overlap_penalty)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for d, m in itertools.product(range(days), range(len(meals))):
+                if time.perf_counter() >= deadline:
+                    break
+                current = plan[d][m]
+                for candidate in pools[m]:
+                    if current is None or candidate[0] == current[0] or uses.get(candidate[0], 0) >= caps[m]:
+                        continue
+                    plan[d][m] = candidate
+                    value = _plan_objective(plan, overlap_penalty)
+                    if value > best:
+                        uses[current[0]] -= 1
+                        uses[candidate[0]] = uses.get(candidate[0], 0) + 1
+                        best, current, improved = value, candidate, True
+                    else:
+                        plan[d][m] = current
+
+        # 4. Materialize the chosen rows as recommend()-style records
+        chosen = sorted({c[0] for day in plan for c in day if c is not None})
+        records = catalog.take(chosen, [c for c in RESULT_COLUMNS if c != 'score']).to_dict(orient='index')
+        result_days = []
+        for d, day in enumerate(plan):
+            entry = {"day": d + 1}
+            for meal, choice in zip(meals, day):
+                entry[meal] = None if choice is None else dict(records[choice[0]], score=choice[1])
+            result_days.append(entry)
+
+        return {
+            "days": result_days,
+            "score": int(best),
+            "suitability": int(sum(c[1] for day in plan for c in day if c is not None)),
+            "solve_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    # ---------------------------------------------------------
+    # MATERIALIZED RANKING CACHE
+    # ---------------------------------------------------------
+    def _current_catalog(self):
+        # Shared catalog, swapped for a fresh one if the dataset file's content changed
+        return refresh_catalog(self.dishes_file)
+
+    def _build_rankings(self, catalog, current_season):
+        """Precompute the top-10 records for every (dosha pair, meal type) combination."""
+        meals = [None] + sorted({m.lower() for m in catalog.dish_types if m})
+        rankings = {}
+        for primary in DOSHAS:
+            for secondary in [None] + [d for d in DOSHAS if d != primary]:
+                for meal in meals:
+                    ranked = self._rank(catalog, primary, secondary, current_season, meal)
+                    rankings[(primary, secondary, meal)] = ranked.to_dict(orient='records')
+
+        next(self._rebuilds)
+        return rankings
+
+    def recommend_records(self, user_dosha, meal_type=None, exclude_ingredients=None, require_ingredients=None):
+        """
+        Same ranking as recommend(), returned as a list of record dicts.
+        Known (dosha, meal) combinations are served straight from the ranking table,
+        which is rebuilt lazily when the dataset changes or the season rolls over.
+        """
+        current_season = self._get_season()
+        catalog = self._current_catalog()
+
+        # Ingredient-filtered rankings are per-user, so they skip the table
+        allowed = catalog.ingredients.filter_mask(exclude_ingredients, require_ingredients)
+        if allowed is not None:
+            primary, secondary = self._split_dosha(user_dosha)
+            ranked = self._rank(catalog, primary, secondary, current_season, meal_type, allowed=allowed)
+            return ranked.to_dict(orient='records')
+
+        built_for, rankings = self._rankings
+        if built_for != (catalog, current_season):
+            # Concurrent rebuilds just do duplicate work; the last one wins the swap
+            rankings = self._build_rankings(catalog, current_season)
+            self._rankings = ((catalog, current_season), rankings)
+
+        primary, secondary = self._split_dosha(user_dosha)
+        key = (primary, secondary or None, meal_type.lower() if meal_type else None)
+        records = rankings.get(key)
+        if records is not None:
+            next(self._hits)
+            return records
+
+        # Outside the precomputed space (e.g. unusual casing) -> score on demand
+        next(self._misses)
+        ranked = self._rank(catalog, primary, secondary, current_season, meal_type)
+        return ranked.to_dict(orient='records')
 
 # --- SIMULATION ---
 if __name__ == "__main__":
     # Initialize System
     recommender = DietRecommender("dishes_dataset.csv")
-    
+
     # Scenario 1: A Complex User (Vata-Pitta) asking for Dinner
     user_dosha = "Vata-Pitta"
     print(f"🥗 Recommendations for {user_dosha} (Sorted by Relevance):")
-    
+
     results = recommender.recommend(user_dosha, meal_type="Dinner")
-    
+
     # Display nicely
-    print(results.to_string(index=False))
\ No newline at end of file
+    print(results.to_string(index=False))
@@ -1,6 +1,6 @@
 import time
 import sys
-from progress_db import ProgressDB
+from progress_db import ProgressDB, DEFAULT_USER
 
 class SattvaTracker:
     def __init__(self):
@@ -31,7 +31,7 @@ class SattvaTracker:
             ]
         }
 
-    def start_tracking(self, dosha):
+    def start_tracking(self, dosha, user_id=DEFAULT_USER):
         # Handle dual dosha
         primary_dosha = dosha.split("-")[0].capitalize()
 
@@ -59,7 +59,7 @@ class SattvaTracker:
         percentage = int((total_score / max_possible) * 100)
 
         # Save once (✔ FIXED)
-        self.db.save_score(primary_dosha, percentage)
+        self.db.save_score(primary_dosha, percentage, user_id=user_id)
         print("📊 Daily score saved to your wellness history!")
 
         print("-" * 50)
@@ -1,5 +1,5 @@
 # server.py
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, send_from_directory, jsonify, request
 from diet_pdf import DietPDFGenerator
 import os
 import pandas as pd
@@ -17,7 +17,11 @@ generator = DietPDFGenerator("dishes_dataset.csv")
 @app.route("/download/full/<dosha>")
 def download_full(dosha):
     try:
-        path = generator.generate_full_chart(dosha, "full_chart.pdf")
+        path = generator.generate_full_chart(
+            dosha, "full_chart.pdf",
+            exclude_ingredients=request.args.get("exclude_ingredients"),
+            require_ingredients=request.args.get("require_ingredients")
+        )
         return send_from_directory(PDF_DIR, "full_chart.pdf", as_attachment=True)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -29,8 +33,12 @@ def download_full(dosha):
 def download_filtered(dosha, meal):
     try:
         # Frontend must send meal name like Lunch / Dinner
-        df = generator.filter_by_dosha(dosha)
-        df = df[df['meal_type'].str.lower() == meal.lower()]  # meal must exist in your CSV
+        df = generator.filter_by_dosha(
+            dosha,
+            exclude_ingredients=request.args.get("exclude_ingredients"),
+            require_ingredients=request.args.get("require_ingredients"),
+            meal_type=meal  # matched against the dish_type column
+        )
 
         if df.empty:
             return jsonify({"error": "No dishes found"}), 404
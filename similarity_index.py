@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Columns that describe what a dish is like, and the separator inside each cell
+FEATURE_COLUMNS = {
+    'ingredients': ',',
+    'taste_profile': ',',
+    'effect': None,
+    'season': None,
+}
+
+
+class SimilarityIndex:
+    """
+    Precomputed "more like this" neighbors for every dish.
+
+    Each dish becomes a sparse TF-IDF vector over its ingredients, taste
+    profile, effect and season tokens. Dishes with identical token sets share
+    one profile, and the nearest profiles (cosine similarity) of every profile
+    are computed once at build time, so a lookup only walks a short, already
+    sorted neighbor list.
+    """
+    def __init__(self, catalog, n_neighbors=50, block_size=512):
+        self.n_dishes = len(catalog)
+
+        # 1. Tokenize: one row per (dish, "column:token")
+        parts = []
+        for col, sep in FEATURE_COLUMNS.items():
+            values = pd.Series(catalog.column(col)).fillna("").astype(str).str.lower()
+            tokens = values.str.split(sep).explode() if sep else values
+            tokens = tokens.str.strip()
+            parts.append(col + ":" + tokens[tokens != ""])
+        tokens = pd.concat(parts)
+        token_ids, vocab = pd.factorize(tokens)
+        rows = tokens.index.to_numpy(dtype=np.int64)
+
+        # 2. Dishes with the same token set share a profile (and its neighbor list)
+        x = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, token_ids)),
+                              shape=(self.n_dishes, len(vocab)))
+        x.sum_duplicates()
+        x.data[:] = 1.0
+        signature = pd.Series([row.tobytes() for row in np.split(x.indices, x.indptr[1:-1])])
+        self.profile_of, _ = pd.factorize(signature)
+        _, representatives = np.unique(self.profile_of, return_index=True)
+
+        # 3. TF-IDF weights (document frequency over all dishes), L2-normalized rows
+        doc_freq = np.bincount(x.indices, minlength=len(vocab))
+        idf = (np.log((1 + self.n_dishes) / (1 + doc_freq)) + 1).astype(np.float32)
+        profiles = x[representatives] @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(profiles.multiply(profiles).sum(axis=1))).ravel()
+        profiles = sparse.diags(1 / np.maximum(norms, 1e-12)) @ profiles
+        profiles = profiles.tocsr().astype(np.float32)
+
+        # 4. Top neighbors of every profile, computed in blocks to bound memory
+        n_profiles = profiles.shape[0]
+        k = min(n_neighbors, n_profiles - 1)
+        self.neighbors = np.zeros((n_profiles, max(k, 0)), dtype=np.int32)
+        self.scores = np.zeros((n_profiles, max(k, 0)), dtype=np.float32)
+        for start in range(0, n_profiles if k > 0 else 0, block_size):
+            block = (profiles[start:start + block_size] @ profiles.T).toarray()
+            block[np.arange(len(block)), np.arange(start, start + len(block))] = -1  # not yourself
+            top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            self.neighbors[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+            self.scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+
+        # 5. Profile -> member dishes (CSR-style)
+        self.members = np.argsort(self.profile_of, kind="stable").astype(np.int64)
+        self.member_bounds = np.searchsorted(self.profile_of[self.members], np.arange(n_profiles + 1))
+        self._catalog = catalog
+        self._row_by_name = None
+
+    @classmethod
+    def from_arrays(cls, catalog, profile_of, neighbors, scores, members, member_bounds):
+        """Rebuild an index from saved arrays (e.g. memory-mapped arrays of a compiled catalog)."""
+        index = cls.__new__(cls)
+        index.n_dishes = len(catalog)
+        index.profile_of, index.neighbors, index.scores = profile_of, neighbors, scores
+        index.members, index.member_bounds = members, member_bounds
+        index._catalog = catalog
+        index._row_by_name = None
+        return index
+
+    def arrays(self):
+        """The arrays from_arrays() needs, by name (what a compiled catalog stores)."""
+        return {"profile_of": self.profile_of, "neighbors": self.neighbors, "scores": self.scores,
+                "members": self.members, "member_bounds": self.member_bounds}
+
+    def find(self, dish_name):
+        """Row number of a dish by (case-insensitive) name, or None."""
+        if self._row_by_name is None:
+            # name -> first dish row, built on the first lookup
+            names = pd.Series(self._catalog.column('dish_name')).astype(str).str.strip().str.lower()
+            self._row_by_name = dict(zip(names[::-1], range(self.n_dishes - 1, -1, -1)))
+        return self._row_by_name.get(str(dish_name).strip().lower())
+
+    def similar(self, row, k=10, exclude=None):
+        """
+        Up to k (row, similarity) pairs most like dish `row`, best first.
+        `exclude` is an optional list of per-dish boolean masks (e.g. the catalog's
+        avoids_for masks of the user's doshas); a dish True in any of them is skipped.
+        Only the candidates visited are looked up, so no mask is built per call.
+        """
+        if k <= 0:
+            return []
+        profile = self.profile_of[row]
+        results = []
+        # Dishes with the very same profile first, then the precomputed neighbor profiles
+        for p, score in self._candidates(profile):
+            for r in self.members[self.member_bounds[p]:self.member_bounds[p + 1]].tolist():
+                if r == row or (exclude and any(mask[r] for mask in exclude)):
+                    continue
+                results.append((r, round(score, 4)))
+                if len(results) == k:
+                    return results
+        return results
+
+    def _candidates(self, profile):
+        yield profile, 1.0
+        for p, score in zip(self.neighbors[profile].tolist(), self.scores[profile].tolist()):
+            if score <= 0:
+                return
+            yield p, score
@@ -7,7 +7,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
 async function loadChart() {
     try {
-        const response = await fetch('http://localhost:5000/analytics/graph');
+        const response = await fetch(`http://localhost:5000/analytics/graph?user_id=${encodeURIComponent(getUserId())}`);
         if (response.ok) {
             const blob = await response.blob();
             const url = URL.createObjectURL(blob);
@@ -29,7 +29,7 @@ async function loadChart() {
 
 async function loadInsights() {
     try {
-        const response = await fetch('http://localhost:5000/analytics/insights');
+        const response = await fetch(`http://localhost:5000/analytics/insights?user_id=${encodeURIComponent(getUserId())}`);
         const data = await response.json();
         
         const insights = data.insights || 'No insights available at this time.';
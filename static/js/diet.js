@@ -2,7 +2,7 @@
 
 let currentDosha = localStorage.getItem('userDosha') || 'Vata';
 let currentMeal = 'All';
-let currentRecommendations = [];
+let currentRecommendations = {};
 
 document.addEventListener('DOMContentLoaded', function() {
     const doshaSelect = document.getElementById('dosha-select');
@@ -39,17 +39,18 @@ async function loadRecommendations() {
     showLoading(container);
 
     try {
-        const response = await fetch('http://localhost:5000/get_diet', {
+        // One request returns the lists for every meal button
+        const response = await fetch('http://localhost:5000/get_diet_all', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ dosha: currentDosha, meal: currentMeal === 'All' ? '' : currentMeal })
+            body: JSON.stringify({ dosha: currentDosha })
         });
 
         const data = await response.json();
         currentRecommendations = data;
-        displayRecommendations(data);
+        filterRecommendations();
         
-        if (data.length > 0) {
+        if ((data.All || []).length > 0) {
             document.getElementById('download-btn').style.display = 'block';
         }
     } catch (error) {
@@ -59,14 +60,7 @@ async function loadRecommendations() {
 }
 
 function filterRecommendations() {
-    if (currentMeal === 'All') {
-        displayRecommendations(currentRecommendations);
-    } else {
-        const filtered = currentRecommendations.filter(item => 
-            item.meal_type && item.meal_type.toLowerCase() === currentMeal.toLowerCase()
-        );
-        displayRecommendations(filtered);
-    }
+    displayRecommendations(currentRecommendations[currentMeal] || []);
 }
 
 function displayRecommendations(recommendations) {
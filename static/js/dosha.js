@@ -1,53 +1,52 @@
 // Dosha Diagnosis Quiz Logic
 
-const questions = [
-    {
-        icon: '🍽️',
-        label: 'Digestion',
-        options: ['fast', 'slow', 'moderate']
-    },
-    {
-        icon: '😴',
-        label: 'Sleep',
-        options: ['light', 'deep', 'moderate']
-    },
-    {
-        icon: '⚡',
-        label: 'Energy',
-        options: ['low', 'high', 'moderate']
-    },
-    {
-        icon: '🌡️',
-        label: 'Temperature Preference',
-        options: ['cold', 'warm', 'moderate']
-    },
-    {
-        icon: '😊',
-        label: 'Mood',
-        options: ['anxious', 'calm', 'irritable']
-    },
-    {
-        icon: '👤',
-        label: 'Body Frame',
-        options: ['slim', 'broad', 'medium']
-    }
-];
+// Display info per model feature; which question comes next (and its options) is decided by /next_question
+const questions = {
+    digestion: { icon: '🍽️', label: 'Digestion' },
+    sleep: { icon: '😴', label: 'Sleep' },
+    energy: { icon: '⚡', label: 'Energy' },
+    temperature_preference: { icon: '🌡️', label: 'Temperature Preference' },
+    mood: { icon: '😊', label: 'Mood' },
+    body_frame: { icon: '👤', label: 'Body Frame' }
+};
+const totalQuestions = Object.keys(questions).length;
 
-let currentQuestion = 0;
 let answers = {};
 
 function initQuiz() {
-    showQuestion(0);
+    answers = {};
+    askNextQuestion();
 }
 
-function showQuestion(index) {
-    if (index >= questions.length) {
-        submitQuiz();
-        return;
+async function askNextQuestion() {
+    try {
+        // Adaptive quiz: the server stops as soon as more answers can't change the result
+        const response = await fetch('http://localhost:5000/next_question', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answers: answers })
+        });
+        const step = await response.json();
+
+        if (step.error) {
+            throw new Error(step.error);
+        }
+        if (step.done) {
+            showLoading(document.getElementById('quiz-container'));
+            await finishQuiz(step.result);
+        } else {
+            showQuestion(step);
+        }
+    } catch (error) {
+        console.error('Error:', error);
+        document.getElementById('quiz-container').innerHTML = 
+            '<div class="question-card"><p style="color: red;">Error submitting quiz. Please try again.</p></div>';
     }
+}
 
-    currentQuestion = index;
-    const question = questions[index];
+function showQuestion(step) {
+    const key = step.question;
+    const question = questions[key] || { icon: '🌿', label: key };
     const container = document.getElementById('quiz-container');
     
     container.innerHTML = `
@@ -55,8 +54,8 @@ function showQuestion(index) {
             <span class="question-icon">${question.icon}</span>
             <div class="question-label">${question.label}</div>
             <div class="option-group">
-                ${question.options.map(option => `
-                    <button class="option-btn" onclick="selectOption('${question.label.toLowerCase().replace(' ', '_')}', '${option}')">
+                ${step.options.map(option => `
+                    <button class="option-btn" onclick="selectOption('${key}', '${option}')">
                         ${option.charAt(0).toUpperCase() + option.slice(1)}
                     </button>
                 `).join('')}
@@ -64,7 +63,7 @@ function showQuestion(index) {
         </div>
     `;
 
-    updateProgress();
+    updateProgress(step.questions_asked);
 }
 
 function selectOption(key, value) {
@@ -76,56 +75,30 @@ function selectOption(key, value) {
     event.target.classList.add('selected');
     
     // Move to next question after a short delay
-    setTimeout(() => {
-        showQuestion(currentQuestion + 1);
-    }, 500);
+    setTimeout(askNextQuestion, 500);
 }
 
-function updateProgress() {
-    const progress = ((currentQuestion + 1) / questions.length) * 100;
+function updateProgress(asked) {
+    const progress = ((asked + 1) / totalQuestions) * 100;
     document.getElementById('progress-bar').style.width = progress + '%';
-    document.getElementById('progress-text').textContent = `Question ${currentQuestion + 1} of ${questions.length}`;
+    document.getElementById('progress-text').textContent = `Question ${asked + 1} of up to ${totalQuestions}`;
 }
 
-async function submitQuiz() {
-    // Map answers to API format
-    const profile = {
-        digestion: answers.digestion || 'moderate',
-        sleep: answers.sleep || 'moderate',
-        energy: answers.energy || 'moderate',
-        temperature_preference: answers.temperature_preference || 'moderate',
-        mood: answers.mood || 'calm',
-        body_frame: answers.body_frame || 'medium'
-    };
-
-    showLoading(document.getElementById('quiz-container'));
+async function finishQuiz(result) {
+    displayResults(result);
     
-    try {
-        const response = await fetch('http://localhost:5000/predict_dosha', {
+    // Save quiz result to analytics database
+    if (result.dosha && result.confidence) {
+        const confidenceNum = parseInt(result.confidence);
+        await fetch('http://localhost:5000/save_quiz_score', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(profile)
+            body: JSON.stringify({
+                user_id: getUserId(),
+                dosha: result.dosha,
+                score: confidenceNum  // Use confidence as wellness score
+            })
         });
-        
-        const result = await response.json();
-        displayResults(result);
-        
-        // Save quiz result to analytics database
-        if (result.dosha && result.confidence) {
-            const confidenceNum = parseInt(result.confidence);
-            await fetch('http://localhost:5000/save_quiz_score', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    dosha: result.dosha,
-                    score: confidenceNum  // Use confidence as wellness score
-                })
-            });
-        }
-    } catch (error) {
-        console.error('Error:', error);
-        document.getElementById('quiz-container').innerHTML = 
-            '<div class="question-card"><p style="color: red;">Error submitting quiz. Please try again.</p></div>';
     }
 }
 
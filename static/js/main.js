@@ -54,6 +54,21 @@ async function apiCall(endpoint, method = "GET", data = null) {
     }
 }
 
+// ----------------------------
+// User Identity (anonymous, per browser)
+// Scopes progress history and analytics to this visitor
+// ----------------------------
+function getUserId() {
+    let userId = localStorage.getItem('dietvedaUserId');
+    if (!userId) {
+        userId = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : 'u-' + Date.now().toString(36) + Math.random().toString(36).slice(2);
+        localStorage.setItem('dietvedaUserId', userId);
+    }
+    return userId;
+}
+
 // ----------------------------
 // Smooth Scroll Helper
 // ----------------------------
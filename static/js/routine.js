@@ -151,6 +151,7 @@ function calculateScore() {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
+            user_id: getUserId(),
             dosha: dosha,
             score: percentage
         })
@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Importing flask_backend starts the writer, compaction, model watcher and feedback
+# learner. Point them at a scratch directory before any module reads these paths,
+# so a test run never touches the developer's progress.db, models/ or feedback.
+SCRATCH = tempfile.mkdtemp(prefix="dietveda-tests-")
+os.environ["DIETVEDA_PROGRESS_DB"] = os.path.join(SCRATCH, "progress.db")
+os.environ["DIETVEDA_MODEL_ROOT"] = os.path.join(SCRATCH, "models")
+os.environ["DIETVEDA_FEEDBACK_FILE"] = os.path.join(SCRATCH, "feedback.jsonl")
+os.environ["DIETVEDA_FEEDBACK_SNAPSHOT"] = os.path.join(SCRATCH, "feedback_counts.npz")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if "progress_db" in sys.modules:
+        sys.modules["progress_db"].close_all_pools()
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def _repo_cwd(monkeypatch):
+    # The modules open their data files (dishes_dataset.csv, *.pkl) relative to the repo root
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope="session")
+def app():
+    import flask_backend
+    if not hasattr(flask_backend, "diet_engine"):
+        pytest.skip("flask_backend did not initialize (train the model first: python trian_brain.py)")
+    return flask_backend.app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope="session")
+def brain():
+    from predictor import DietVedaAI, MODEL_FILE, COMPILED_MODEL_DIR
+    if not (os.path.exists(os.path.join(ROOT, MODEL_FILE)) or os.path.isdir(os.path.join(ROOT, COMPILED_MODEL_DIR))):
+        pytest.skip("no trained model (run: python trian_brain.py)")
+    return DietVedaAI(os.path.join(ROOT, ""))
@@ -0,0 +1,26 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+
+DOSHAS = ["Vata", "Pitta", "Kapha", "Vata-Pitta", "Kapha-Vata", "Pitta-Kapha", "vata-kapha"]
+MEALS = ["", "Breakfast", "Lunch", "Dinner", "Snack"]
+FILTERS = [{}, {"exclude_ingredients": "ghee"}, {"require_ingredients": ["rice"]}]
+REQUESTS = [dict(dosha=d, meal=m, **f) for d, m, f in itertools.product(DOSHAS, MEALS, FILTERS)]
+
+
+def test_concurrent_get_diet_matches_serial_run(app):
+    client = app.test_client()
+    serial = [client.post("/get_diet", json=body).get_json() for body in REQUESTS]
+    assert all(isinstance(body, list) for body in serial)
+    assert any(serial)
+
+    def call(i):
+        response = app.test_client().post("/get_diet", json=REQUESTS[i % len(REQUESTS)])
+        return i, response.status_code, response.get_json()
+
+    with ThreadPoolExecutor(32) as pool:
+        results = list(pool.map(call, range(4000)))
+
+    mismatches = [i for i, status, body in results
+                  if status != 200 or body != serial[i % len(REQUESTS)]]
+    assert not mismatches, f"{len(mismatches)} of {len(results)} concurrent responses differ from the serial run"
@@ -0,0 +1,68 @@
+import os
+import shutil
+
+import dish_catalog
+from dish_catalog import get_catalog, reload_catalog
+
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def test_touch_without_changes_is_hashed_once(tmp_path, monkeypatch):
+    csv = str(tmp_path / "dishes.csv")
+    shutil.copy("dishes_dataset.csv", csv)
+    catalog = get_catalog(csv)
+
+    hashed = []
+    real_hash = dish_catalog._file_hash
+    monkeypatch.setattr(dish_catalog, "_file_hash", lambda path: hashed.append(path) or real_hash(path))
+
+    _bump_mtime(csv)
+    assert reload_catalog(csv) is False
+    assert reload_catalog(csv) is False
+    assert len(hashed) == 1
+    assert get_catalog(csv) is catalog
+
+
+def test_changed_content_installs_new_generation(tmp_path):
+    csv = str(tmp_path / "dishes.csv")
+    shutil.copy("dishes_dataset.csv", csv)
+    catalog = get_catalog(csv)
+
+    with open(csv) as f:
+        lines = f.readlines()
+    with open(csv, "w") as f:
+        f.writelines(lines[:-1])
+    _bump_mtime(csv)
+
+    assert reload_catalog(csv) is True
+    fresh = get_catalog(csv)
+    assert fresh.generation == catalog.generation + 1
+    assert len(fresh) == len(catalog) - 1
+
+
+def test_compiled_catalog_ships_the_neighbor_index(tmp_path):
+    from dish_catalog import DishCatalog, compile_catalog
+    csv_catalog = DishCatalog("dishes_dataset.csv")
+    assert csv_catalog._similarity is None  # built on first use, not at load
+
+    compiled = DishCatalog(compile_catalog("dishes_dataset.csv", str(tmp_path / "dishes.dvcat")))
+    assert compiled._similarity is not None
+    for row in range(0, len(csv_catalog), 7):
+        assert compiled.similarity.similar(row, k=10) == csv_catalog.similarity.similar(row, k=10)
+    name = csv_catalog.take([3], ["dish_name"]).iloc[0]["dish_name"]
+    assert compiled.similarity.find(name.upper()) == csv_catalog.similarity.find(name) == 3
+
+
+def test_similar_skips_avoided_dishes_without_a_catalog_mask():
+    from dish_catalog import DishCatalog
+    catalog = DishCatalog("dishes_dataset.csv")
+    masks = catalog.avoid_masks("vata-Pitta")
+    assert masks[0] is catalog.avoids["Vata"] and masks[1] is catalog.avoids["Pitta"]
+    avoided = catalog.avoid_mask("Vata-Pitta")
+    for row in range(0, len(catalog), 11):
+        everything = catalog.similarity.similar(row, k=len(catalog))
+        expected = [(r, score) for r, score in everything if not avoided[r]][:10]
+        assert catalog.similarity.similar(row, k=10, exclude=masks) == expected
@@ -0,0 +1,91 @@
+import os
+
+
+def test_get_diet_all_accepts_numeric_string_k(client):
+    response = client.post("/get_diet_all", json={"dosha": "Vata", "k": "2"})
+    assert response.status_code == 200
+    assert all(len(records) <= 2 for records in response.get_json().values())
+
+
+def test_get_diet_all_rejects_invalid_k(client):
+    for k in (-1, "lots", {"Lunch": -2}):
+        response = client.post("/get_diet_all", json={"dosha": "Vata", "k": k})
+        assert response.status_code == 400, k
+
+
+def test_similar_dishes_k(client):
+    import flask_backend
+    dish = flask_backend.get_catalog("dishes_dataset.csv").take([0], ["dish_name"]).iloc[0]["dish_name"]
+    assert client.get("/similar_dishes", query_string={"dish": dish, "k": -1}).status_code == 400
+    response = client.get("/similar_dishes", query_string={"dish": dish, "k": 0})
+    assert response.status_code == 200 and response.get_json()["similar"] == []
+    response = client.get("/similar_dishes", query_string={"dish": dish, "k": 3})
+    assert len(response.get_json()["similar"]) <= 3
+
+
+def test_analytics_graph_is_rendered_in_memory(client, monkeypatch):
+    import datetime
+    import analytics
+
+    class _History:
+        def get_daily_scores(self, user_id, days):
+            return [(str(datetime.date.today()), 80.0, "Vata")] if user_id == "graph-user" else []
+
+    monkeypatch.setattr(analytics, "ProgressDB", _History)
+    before = set(os.listdir("DietVeda_Reports")) if os.path.isdir("DietVeda_Reports") else set()
+    response = client.get("/analytics/graph", query_string={"user_id": "graph-user", "days": 90})
+    assert response.status_code == 200 and response.mimetype == "image/png"
+    assert response.data.startswith(b"\x89PNG")
+    assert client.get("/analytics/graph", query_string={"user_id": "nobody"}).status_code == 404
+    after = set(os.listdir("DietVeda_Reports")) if os.path.isdir("DietVeda_Reports") else set()
+    assert after == before
+
+
+def test_save_score_rejects_bad_score(client):
+    for route in ("/save_quiz_score", "/save_routine_score"):
+        response = client.post(route, json={"dosha": "Vata", "score": "abc", "user_id": "bad-score"})
+        assert response.status_code == 400, route
+
+
+def test_admin_routes_need_local_caller_or_token(client, monkeypatch):
+    import flask_backend
+    activate = {"json": {"version": "no-such-version"}}
+    monkeypatch.setattr(flask_backend, "ADMIN_TOKEN", None)
+    assert client.post("/admin/models/activate", **activate).status_code == 400  # local CLI call
+    assert client.post("/admin/models/activate", headers={"Origin": "https://evil.example"}, **activate).status_code == 403
+    assert client.post("/admin/models/rollback", environ_base={"REMOTE_ADDR": "10.0.0.5"}).status_code == 403
+    assert client.post("/admin/reload_catalog", headers={"Origin": "https://evil.example"}).status_code == 403
+
+    monkeypatch.setattr(flask_backend, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/models/activate", **activate).status_code == 403
+    assert client.post("/admin/models/activate", headers={"X-Admin-Token": "wrong"}, **activate).status_code == 403
+    response = client.post("/admin/models/activate", headers={"X-Admin-Token": "s3cret", "Origin": "https://ops.example"}, **activate)
+    assert response.status_code == 400
+
+
+def test_feedback_is_admin_only(client, monkeypatch):
+    import flask_backend
+    monkeypatch.setattr(flask_backend, "ADMIN_TOKEN", "s3cret")
+    feedback = {"json": {"profile": {}, "dosha": "not-a-dosha"}}
+    assert client.post("/feedback", headers={"Origin": "https://evil.example"}, **feedback).status_code == 403
+    assert client.post("/feedback", headers={"X-Admin-Token": "s3cret"}, **feedback).status_code == 400
+
+
+def test_get_meal_plan_rejects_bad_numbers(client):
+    for body in ({"days": "week"}, {"max_repeats": None}, {"days": 0}, {"max_repeats": [2]}):
+        response = client.post("/get_meal_plan", json=dict(body, dosha="Vata"))
+        assert response.status_code == 400, body
+    response = client.post("/get_meal_plan", json={"dosha": "Vata", "days": "3"})
+    assert response.status_code == 200 and len(response.get_json()["days"]) == 3
+
+
+def test_predict_dosha_explain(client):
+    import flask_backend
+    brain = flask_backend.ai_brain
+    profile = {f: next(iter(brain._codes[f])) for f in brain.features}
+    plain = client.post("/predict_dosha", json=profile).get_json()
+    assert "explanation" not in plain
+    explained = client.post("/predict_dosha?explain=1", json=profile).get_json()
+    assert explained["dosha"] == plain["dosha"]
+    assert set(explained["explanation"]["contributions"]) == set(brain.features)
+    assert explained["explanation"]["top_factors"]
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from ingredient_index import IngredientIndex, parse_ingredient_list
+
+INGREDIENTS = [
+    "rice, ghee, cumin",
+    "Spinach, Paneer , ghee",
+    "moong dal, rice",
+    None,
+    "paneer, capsicum, ghee, rice",
+]
+
+
+def _dishes(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+def test_exclude_removes_every_dish_with_the_ingredient():
+    index = IngredientIndex(INGREDIENTS)
+    assert _dishes(index.filter_mask(exclude_ingredients=["ghee"])) == [2, 3]
+    assert _dishes(index.filter_mask(exclude_ingredients="ghee, rice")) == [3]
+
+
+def test_require_keeps_dishes_with_all_ingredients():
+    index = IngredientIndex(INGREDIENTS)
+    assert _dishes(index.filter_mask(require_ingredients=["rice"])) == [0, 2, 4]
+    assert _dishes(index.filter_mask(require_ingredients="rice, ghee")) == [0, 4]
+    assert _dishes(index.filter_mask(exclude_ingredients="cumin", require_ingredients="rice, ghee")) == [4]
+
+
+def test_unknown_ingredients():
+    index = IngredientIndex(INGREDIENTS)
+    assert index.filter_mask(exclude_ingredients=["saffron"]).all()
+    assert not index.filter_mask(require_ingredients=["saffron"]).any()
+    assert index.filter_mask() is None and index.filter_mask([], "") is None
+
+
+def test_case_and_whitespace_are_normalized():
+    index = IngredientIndex(INGREDIENTS)
+    assert parse_ingredient_list(" Ghee ,PANEER,, ") == ["ghee", "paneer"]
+    assert _dishes(index.filter_mask(require_ingredients="  PANEER ")) == [1, 4]
+    assert _dishes(index.filter_mask(exclude_ingredients=["Spinach"])) == [0, 2, 3, 4]
+
+
+def test_from_postings_matches_fresh_build():
+    df = pd.read_csv("dishes_dataset.csv")
+    index = IngredientIndex(df["ingredients"])
+    loaded = IngredientIndex.from_postings(list(index.vocab), index.rows.copy(), index.bounds.copy(), index.n_dishes)
+    names = list(index.vocab)
+    for exclude, require in ((names[:3], None), (None, names[5:6]), (names[-2:], names[10:11])):
+        expected = index.filter_mask(exclude, require)
+        assert np.array_equal(loaded.filter_mask(exclude, require), expected)
+
+        # Same answer as scanning the raw strings
+        tokens = df["ingredients"].fillna("").str.lower().str.split(",").map(lambda t: {s.strip() for s in t})
+        scan = tokens.map(lambda t: not (set(exclude or ()) & t) and set(require or ()) <= t).to_numpy()
+        assert np.array_equal(expected, scan)
@@ -0,0 +1,47 @@
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+
+from model_registry import HOLDOUT_FILE, ModelManager, publish_model, read_manifest
+from predictor import ENCODERS_FILE, MODEL_FILE
+from trian_brain import decode_rows, load_encoded_dataset, split_holdout
+
+
+def _publish(tmp_path, model_params, name):
+    """Train on the split's training rows only and publish with the held-out rows."""
+    X, y, encoders = load_encoded_dataset()
+    X_train, y_train, X_holdout, y_holdout = split_holdout(X, y)
+    model = RandomForestClassifier(random_state=0, **model_params).fit(X_train, y_train)
+
+    source = tmp_path / name
+    source.mkdir()
+    joblib.dump(model, source / MODEL_FILE)
+    joblib.dump(encoders, source / ENCODERS_FILE)
+    decode_rows(X_holdout, y_holdout, encoders).to_csv(source / HOLDOUT_FILE, index=False)
+    return publish_model(str(source), root=str(tmp_path / "models")), len(y_holdout)
+
+
+def test_holdout_split_is_disjoint_and_stratified():
+    X, y, _ = load_encoded_dataset()
+    X_train, y_train, X_holdout, y_holdout = split_holdout(X, y)
+    assert set(X_train.index).isdisjoint(X_holdout.index)
+    assert len(X_train) + len(X_holdout) == len(X)
+    assert set(y_holdout) == set(y)
+
+
+def test_version_is_validated_on_its_own_holdout(tmp_path, brain):
+    version, n_holdout = _publish(tmp_path, {"n_estimators": 50}, "good")
+    assert HOLDOUT_FILE in read_manifest(version, str(tmp_path / "models"))["files"]
+
+    manager = ModelManager(root=str(tmp_path / "models"))
+    assert manager.activate(version, background=False)
+    assert manager.status["holdout_accuracy"] is not None
+
+
+def test_weak_model_is_rejected(tmp_path, brain):
+    # A single depth-1 tree can tell at most two of the three doshas apart
+    version, _ = _publish(tmp_path, {"n_estimators": 1, "max_depth": 1}, "weak")
+    manager = ModelManager(root=str(tmp_path / "models"))
+    assert not manager.activate(version, background=False)
+    assert manager.status["state"] == "failed"
+    assert "holdout accuracy" in manager.status["error"]
+    assert manager.version != version
@@ -0,0 +1,54 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from online_learner import FeedbackStore, OnlineLearner
+from predictor import DietVedaAI
+
+
+@pytest.fixture
+def fresh_brain(brain):
+    # The learner rewrites the predictor's table, so never hand it the shared one
+    return DietVedaAI()
+
+
+def _learner(brain, tmp_path):
+    return OnlineLearner(brain, FeedbackStore(str(tmp_path / "feedback.jsonl")),
+                         snapshot_file=str(tmp_path / "counts.npz"))
+
+
+def _predictions(brain):
+    values = [list(brain._codes[f]) for f in brain.features]
+    return [brain.predict(dict(zip(brain.features, combo))) for combo in itertools.product(*values)]
+
+
+def test_feedback_on_one_profile_leaves_other_profiles_unchanged(fresh_brain, tmp_path):
+    before = _predictions(fresh_brain)
+    learner = _learner(fresh_brain, tmp_path)
+
+    # Profile A: confirmed 400 times as a dosha the forest does not predict for it
+    index = 0
+    profile_a = dict(zip(fresh_brain.features, (list(fresh_brain._codes[f])[0] for f in fresh_brain.features)))
+    forest_dosha = max(before[index]["breakdown"], key=before[index]["breakdown"].get)
+    label = next(c for c in fresh_brain.dosha_classes if c != forest_dosha)
+    for _ in range(400):
+        learner.record(profile_a, label)
+    assert learner.update() == 400
+
+    after = _predictions(fresh_brain)
+    assert after[index]["dosha"] == label
+    assert after[:index] + after[index + 1:] == before[:index] + before[index + 1:]
+    assert learner.stats["profiles_with_feedback"] == 1
+
+
+def test_counts_survive_a_restart(fresh_brain, tmp_path):
+    learner = _learner(fresh_brain, tmp_path)
+    profile = dict(zip(fresh_brain.features, (list(fresh_brain._codes[f])[-1] for f in fresh_brain.features)))
+    for _ in range(30):
+        learner.record(profile, "Pitta")
+    learner.update()
+
+    restarted = _learner(DietVedaAI(), tmp_path)
+    np.testing.assert_array_equal(restarted.profile_counts, learner.profile_counts)
+    assert restarted.brain.predict(profile) == fresh_brain.predict(profile)
@@ -0,0 +1,81 @@
+import itertools
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from predictor import MODEL_FILE
+
+
+def all_profiles(brain):
+    values = [list(brain._codes[f]) for f in brain.features]
+    for combo in itertools.product(*values):
+        yield dict(zip(brain.features, combo))
+
+
+def test_lookup_table_covers_every_profile(brain):
+    assert len(brain._served.table) == len(list(all_profiles(brain))) == np.prod([len(brain._codes[f]) for f in brain.features])
+
+
+def test_lookup_table_matches_predict_forest(brain):
+    for profile in all_profiles(brain):
+        assert brain.predict(profile) == brain.predict_forest(profile), profile
+
+
+def test_lookup_table_matches_sklearn_forest(brain):
+    if not os.path.exists(MODEL_FILE):
+        pytest.skip("no pickled forest")
+    forest = joblib.load(MODEL_FILE)
+    profiles = list(all_profiles(brain))
+    encoded = pd.DataFrame([[brain._codes[f][p[f]] for f in brain.features] for p in profiles], columns=brain.features)
+    expected = forest.predict_proba(encoded)
+    got = np.array([[brain.predict(p)["breakdown"][c] for c in brain.dosha_classes] for p in profiles])
+    np.testing.assert_allclose(got, expected, atol=1e-6)
+
+
+def test_predict_reports_missing_and_unknown_answers(brain):
+    profile = next(all_profiles(brain))
+    feature = brain.features[0]
+    assert brain.predict({k: v for k, v in profile.items() if k != feature}) == {"error": f"Missing value for {feature}"}
+    assert brain.predict({**profile, feature: "nope"}) == {"error": f"Unknown value 'nope' for {feature}"}
+
+
+@pytest.mark.parametrize("bad", [["Dry"], {"a": 1}])
+def test_unhashable_answers_get_their_own_error(brain, bad):
+    profile = next(all_profiles(brain))
+    feature = brain.features[1]
+    error = {"error": f"Unknown value '{bad}' for {feature}"}
+
+    assert brain.predict({**profile, feature: bad}) == error
+    assert brain.next_question({feature: bad}) == error
+    results = brain.predict_batch([profile, {**profile, feature: bad}, profile])
+    assert results[1] == error
+    assert results[0] == results[2] == brain.predict(profile)
+
+
+def test_adaptive_quiz_agrees_with_predict(brain):
+    for profile in all_profiles(brain):
+        answers = {}
+        while True:
+            step = brain.next_question(answers)
+            assert "error" not in step, step
+            if step["done"]:
+                break
+            assert step["question"] not in answers and step["options"]
+            answers[step["question"]] = profile[step["question"]]
+        expected = brain.predict(profile)
+        assert step["questions_asked"] == len(answers) <= len(brain.features)
+        assert step["result"]["dosha"] == expected["dosha"], profile
+
+
+def test_explanations_add_up_to_breakdown(brain):
+    tolerance = 5e-5 * (len(brain.features) + 1) + 1e-9  # each term is rounded to 4 places
+    for profile in all_profiles(brain):
+        result = brain.predict(profile, explain=True)
+        explanation = result["explanation"]
+        assert set(explanation["contributions"]) == set(brain.features)
+        for dosha, probability in result["breakdown"].items():
+            total = explanation["baseline"][dosha] + sum(c[dosha] for c in explanation["contributions"].values())
+            assert abs(total - probability) <= tolerance, (profile, dosha)
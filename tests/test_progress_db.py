@@ -0,0 +1,201 @@
+import datetime
+import os
+import sqlite3
+
+import pytest
+
+import progress_db
+from progress_db import ProgressDB, WriteBehindWriter
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "progress.db")
+    yield ProgressDB(path)
+    progress_db._writers.pop(path).close()
+    progress_db._pools.pop(path).close_all()
+
+
+def test_bad_row_does_not_drop_its_batch(db):
+    writer = WriteBehindWriter(db.pool, flush_interval=0.2)
+    today = progress_db.day_to_int(datetime.date.today())
+    writer.submit(("alice", today, "Vata", 70))
+    writer.submit(("mallory", today, ["Vata"], 10))  # bypasses save_score's checks
+    writer.submit(("bob", today, "Pitta", 90))
+    writer.close()
+
+    assert writer.stats["written"] == 2 and writer.stats["failed_rows"] == 1
+    assert [score for _, score, _ in db.get_daily_scores("alice")] == [70.0]
+    assert [score for _, score, _ in db.get_daily_scores("bob")] == [90.0]
+    assert db.get_daily_scores("mallory") == []
+
+
+def test_save_score_rejects_bad_types(db):
+    for dosha, score in ((["Vata"], 10), ("Vata", [10]), ("Vata", "abc"), ("Vata", True)):
+        with pytest.raises(ValueError):
+            db.save_score(dosha, score, user_id="carol")
+    with pytest.raises(ValueError):
+        db.save_score("Vata", 10, user_id={"id": 1})
+    db.save_score("Kapha", 55, user_id="carol", wait=True)
+    assert [dosha for _, _, dosha in db.get_daily_scores("carol")] == ["Kapha"]
+
+
+def test_numeric_string_score_is_saved_as_int(db):
+    db.save_score("Vata", "5", user_id="dave", wait=True)
+    assert db.get_last_30_days("dave")[0][1:] == ("Vata", 5)
+
+
+def test_writer_survives_non_numeric_score(db):
+    writer = WriteBehindWriter(db.pool, flush_interval=0.05)
+    today = progress_db.day_to_int(datetime.date.today())
+    writer.submit(("erin", today, "Vata", "5"))  # bypasses save_score's coercion
+    assert writer.flush(timeout=5)
+    writer.submit(("erin", today, "Pitta", 60))
+    assert writer.flush(timeout=5)
+    assert writer._thread.is_alive()
+    assert writer.stats["failed_rows"] == 1 and writer.stats["written"] == 1
+    writer.close()
+
+
+def _save_history(db, user_id, days=365, every=3):
+    """One save every `every` days over the last `days` days; returns the raw score total."""
+    today = datetime.date.today()
+    total = 0
+    for i in range(0, days, every):
+        score = (i * 7) % 100
+        db.save_score(("Vata", "Pitta", "Kapha")[i % 3], score, user_id=user_id, day=today - datetime.timedelta(days=i))
+        total += score
+    db.writer.flush()
+    return total
+
+
+def _monthly(db, user_id):
+    with db.pool.connection() as conn:
+        return conn.execute("SELECT month, score_sum, score_count, days_tracked, last_date, last_dosha "
+                            "FROM monthly_progress WHERE user_id = ? ORDER BY month", (user_id,)).fetchall()
+
+
+def test_compaction_is_idempotent_and_keeps_hot_window(db):
+    _save_history(db, "frank")
+    recent = db.get_daily_scores("frank", 30)
+    stats = progress_db.compact_history(db.pool.path)
+    assert stats["raw_rows"] > 0
+    archived = _monthly(db, "frank")
+    assert archived
+
+    assert progress_db.compact_history(db.pool.path)["raw_rows"] == 0
+    assert _monthly(db, "frank") == archived
+    assert db.get_daily_scores("frank", 30) == recent
+
+
+def test_compaction_keeps_year_totals(db):
+    total = _save_history(db, "grace")
+    progress_db.compact_history(db.pool.path)
+    with db.pool.connection() as conn:
+        archived = conn.execute("SELECT TOTAL(score_sum), SUM(score_count) FROM monthly_progress WHERE user_id = 'grace'").fetchone()
+        hot = conn.execute("SELECT TOTAL(score_sum), SUM(score_count) FROM daily_progress WHERE user_id = 'grace'").fetchone()
+    assert archived[0] + hot[0] == total
+    assert archived[1] + hot[1] == len(range(0, 365, 3))
+    assert len(db.get_daily_scores("grace", 365)) < len(range(0, 365, 3))
+
+
+def test_late_save_merges_into_archived_month(db):
+    old = datetime.date.today().replace(day=1) - datetime.timedelta(days=200)
+    first, last = old.replace(day=3), old.replace(day=20)
+    db.save_score("Vata", 40, user_id="heidi", day=first)
+    db.save_score("Kapha", 60, user_id="heidi", day=last, wait=True)
+    progress_db.compact_history(db.pool.path)
+    [(month, score_sum, score_count, days, last_date, dosha)] = _monthly(db, "heidi")
+    assert (score_sum, score_count, days, last_date, dosha) == (100.0, 2, 2, progress_db.day_to_int(last), "Kapha")
+
+    # A late save on an archived day and one on a new, earlier day
+    db.save_score("Pitta", 10, user_id="heidi", day=first)
+    db.save_score("Pitta", 30, user_id="heidi", day=old.replace(day=5), wait=True)
+    progress_db.compact_history(db.pool.path)
+    [(_, score_sum, score_count, days, last_date, dosha)] = _monthly(db, "heidi")
+    assert (score_sum, score_count, days) == (140.0, 4, 3)
+    assert (last_date, dosha) == (progress_db.day_to_int(last), "Kapha")  # older late rows don't win
+
+    db.save_score("Pitta", 50, user_id="heidi", day=old.replace(day=25), wait=True)
+    progress_db.compact_history(db.pool.path)
+    [(_, _, _, days, _, dosha)] = _monthly(db, "heidi")
+    assert (days, dosha) == (4, "Pitta")
+
+
+def test_locked_database_is_retried_not_dropped(db, monkeypatch):
+    real_insert, calls = progress_db.insert_rows, []
+
+    def locked_twice(conn, rows):
+        calls.append(len(rows))
+        if len(calls) <= 2:
+            raise sqlite3.OperationalError("database is locked")
+        real_insert(conn, rows)
+
+    monkeypatch.setattr(progress_db, "insert_rows", locked_twice)
+    writer = WriteBehindWriter(db.pool, flush_interval=0.2)
+    today = progress_db.day_to_int(datetime.date.today())
+    for user_id in ("ivan", "judy", "ken"):
+        writer.submit((user_id, today, "Vata", 50))
+    writer.close()
+
+    assert writer.stats["failed_rows"] == 0 and writer.stats["written"] == 3
+    assert all(n == 3 for n in calls)  # retried as one batch, never split
+    assert [score for _, score, _ in db.get_daily_scores("judy")] == [50.0]
+
+
+@pytest.mark.parametrize("user_version", [0, 1])
+def test_first_open_migrates_legacy_file(tmp_path, user_version):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE progress (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT, dosha TEXT, score INTEGER)")
+    conn.executemany("INSERT INTO progress (date, dosha, score) VALUES (?, ?, ?)",
+                     [(str(datetime.date.today()), "Vata", 40), (str(datetime.date.today()), "Pitta", 60)])
+    conn.execute(f"PRAGMA user_version = {user_version}")
+    conn.commit()
+    conn.close()
+
+    pool = progress_db.ConnectionPool(path)
+    try:
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == len(progress_db.MIGRATIONS)
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("SELECT user_id, date, score FROM progress ORDER BY id").fetchall() == [
+                (progress_db.DEFAULT_USER, progress_db.day_to_int(datetime.date.today()), 40),
+                (progress_db.DEFAULT_USER, progress_db.day_to_int(datetime.date.today()), 60)]
+            assert conn.execute("SELECT score_sum, score_count, last_dosha FROM daily_progress").fetchall() == [(100.0, 2, "Pitta")]
+
+        # A second pool (another worker process) finds the schema current and shares the data
+        other = progress_db.ConnectionPool(path)
+        with other.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0] == 2
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == len(progress_db.MIGRATIONS)
+        other.close_all()
+    finally:
+        pool.close_all()
+
+
+def test_close_all_checkpoints_wal(tmp_path):
+    path = str(tmp_path / "wal.db")
+    pool = progress_db.ConnectionPool(path)
+    with pool.connection() as conn, conn:
+        progress_db.insert_rows(conn, [("zoe", 20260101, "Vata", 50)] * 100)
+    assert os.path.getsize(path + "-wal") > 0
+    pool.close_all()
+    assert not os.path.exists(path + "-wal") or os.path.getsize(path + "-wal") == 0
+    conn = sqlite3.connect(path)
+    assert conn.execute("SELECT COUNT(*) FROM progress").fetchone()[0] == 100
+    conn.close()
+
+
+def test_last_30_days_uses_user_date_index(db):
+    db.save_score("Vata", 50, user_id="lena", wait=True)
+    statements = []
+    with db.pool.connection() as conn:  # the nested call below runs on this connection
+        conn.set_trace_callback(statements.append)
+        try:
+            assert db.get_last_30_days("lena")
+        finally:
+            conn.set_trace_callback(None)
+        [query] = [q for q in statements if "FROM progress" in q]
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + query))
+    assert "USING INDEX idx_progress_user_date (user_id=? AND date>?)" in plan, plan
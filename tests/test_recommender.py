@@ -0,0 +1,89 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from dish_catalog import DishCatalog, compile_catalog
+from recommender import DietRecommender, MAX_K, parse_k
+
+DOSHAS = ["Vata", "Pitta", "Kapha"]
+SEASONS = ["Winter", "Summer", "Monsoon", "Spring"]
+# Every primary with no secondary or any other dosha, plus inputs the masks don't cover
+DOSHA_PAIRS = ([(p, None) for p in DOSHAS] + list(itertools.permutations(DOSHAS, 2))
+               + [("vata", "pitta"), ("Vata", ""), ("Pi", None)])
+
+
+@pytest.fixture(scope="module")
+def recommender():
+    return DietRecommender("dishes_dataset.csv")
+
+
+@pytest.fixture(scope="module")
+def compiled_catalog(tmp_path_factory):
+    return DishCatalog(compile_catalog("dishes_dataset.csv", str(tmp_path_factory.mktemp("cat") / "dishes.dvcat")))
+
+
+def _reference_scores(recommender, primary, secondary, season):
+    df = recommender.df
+    return df.apply(lambda row: recommender._calculate_score(row, primary, secondary, season), axis=1).to_numpy()
+
+
+@pytest.mark.parametrize("season", SEASONS)
+@pytest.mark.parametrize("primary,secondary", DOSHA_PAIRS)
+def test_vectorized_scores_match_calculate_score(recommender, primary, secondary, season):
+    expected = _reference_scores(recommender, primary, secondary, season)
+    np.testing.assert_array_equal(recommender._score_catalog(primary, secondary, season), expected)
+
+
+@pytest.mark.parametrize("season", SEASONS)
+@pytest.mark.parametrize("primary,secondary", DOSHA_PAIRS)
+def test_compiled_catalog_scores_match_calculate_score(recommender, compiled_catalog, primary, secondary, season):
+    expected = _reference_scores(recommender, primary, secondary, season)
+    np.testing.assert_array_equal(recommender._score_catalog(primary, secondary, season, compiled_catalog), expected)
+
+
+@pytest.mark.parametrize("value,expected", [(5, 5), ("5", 5), (0, 0), (5.0, 5), (10_000, MAX_K)])
+def test_parse_k_accepts_whole_numbers(value, expected):
+    assert parse_k(value) == expected
+
+
+@pytest.mark.parametrize("value", [-1, "-3", "five", 2.5, None, True, [5]])
+def test_parse_k_rejects_invalid_counts(value):
+    with pytest.raises(ValueError):
+        parse_k(value)
+
+
+def test_recommend_all_validates_k(recommender):
+    assert all(len(records) <= 3 for records in recommender.recommend_all("Vata", k="3").values())
+    assert recommender.recommend_all("Vata", k={"All": 0})["All"] == []
+    with pytest.raises(ValueError):
+        recommender.recommend_all("Vata", k=-1)
+    with pytest.raises(ValueError):
+        recommender.recommend_all("Vata", k={"Lunch": "many"})
+
+
+def test_recommend_stream_with_zero_k(recommender):
+    assert recommender.recommend_stream("Vata", k=0).empty
+
+
+@pytest.mark.parametrize("dosha,days,max_repeats,pool_size", [
+    ("Vata", 7, 1, 30), ("Pitta-Kapha", 14, 2, 30), ("Kapha", 31, 1, 10)])
+def test_plan_week_constraints(recommender, dosha, days, max_repeats, pool_size):
+    plan = recommender.plan_week(dosha, days=days, max_repeats=max_repeats, pool_size=pool_size, time_budget=5)
+    catalog = recommender._current_catalog()
+    avoided = set(catalog.take(np.flatnonzero(catalog.avoid_mask(dosha.split("-")[0])), ["dish_name"])["dish_name"])
+    # Too few dishes per meal relaxes the cap just enough to fill every day
+    cap = max(max_repeats, -(-days // pool_size))
+
+    assert [day["day"] for day in plan["days"]] == list(range(1, days + 1))
+    uses = {}
+    for day in plan["days"]:
+        for meal in ("Breakfast", "Lunch", "Dinner"):
+            record = day[meal]
+            assert record["dish_type"].lower() == meal.lower()
+            assert record["dish_name"] not in avoided
+            uses[record["dish_name"]] = uses.get(record["dish_name"], 0) + 1
+    assert max(uses.values()) <= cap
+
+    again = recommender.plan_week(dosha, days=days, max_repeats=max_repeats, pool_size=pool_size, time_budget=5)
+    assert again["days"] == plan["days"] and again["score"] == plan["score"]
@@ -1,20 +1,111 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import joblib
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score, train_test_split
 from sklearn.preprocessing import LabelEncoder
+from model_registry import publish_model, HOLDOUT_FILE
 
-def train_and_save_complex_model():
-    print("⚙️  Initializing Training Sequence...")
-    
-    # 1. Load Data
-    try:
-        df = pd.read_csv("ayurvedic_dosha_dataset.csv")
-    except FileNotFoundError:
-        print("❌ Error: Dataset not found!")
-        return
+COMPILED_MODEL_DIR = "dietveda_compiled_model"
+COMPILED_FORMAT_VERSION = 1
+REPORT_FILE = "dietveda_model_report.json"
+# Share of the labeled rows kept out of training; the registry validates each version on them
+HOLDOUT_FRACTION = 0.2
+
+# Candidates for --search: (estimator, parameter grid)
+SEARCH_SPACE = [
+    (RandomForestClassifier(), {
+        "n_estimators": [50, 100, 200],
+        "min_samples_split": [2, 5, 10],
+        "max_depth": [None, 6],
+    }),
+    (GradientBoostingClassifier(), {
+        "n_estimators": [50, 100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [2, 3],
+    }),
+]
+# Candidates within this much CV accuracy of the best count as ties; the cheapest one wins
+ACCURACY_TOLERANCE = 0.01
+
+
+def flatten_forest(model):
+    """
+    Pack every tree of a fitted forest into one flat node table (children as
+    absolute node ids), saved as plain .npy files for CompiledForest.
+    Leaves point to themselves, so evaluation can run a fixed number of steps.
+    """
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset, depth = 0, 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, ids, tree.children_left) + offset)
+        right.append(np.where(is_leaf, ids, tree.children_right) + offset)
+        # Leaf class counts (older sklearn) or fractions (newer) -> per-leaf probabilities
+        counts = tree.value[:, 0, :]
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+        roots.append(offset)
 
-    # 2. Advanced Encoding (Saving encoders to handle user input later)
+        offset += tree.node_count
+        depth = max(depth, tree.max_depth)
+
+    return {
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+    }, depth
+
+
+def export_compiled_model(model, encoders, out_dir=COMPILED_MODEL_DIR):
+    """
+    Saves the flattened forest (.npy, memory-mappable) plus the encoder
+    vocabularies as JSON, so DietVedaAI can start without unpickling sklearn.
+    """
+    arrays, depth = flatten_forest(model)
+    meta = {
+        "format_version": COMPILED_FORMAT_VERSION,
+        "features": list(model.feature_names_in_),
+        "classes": [int(c) for c in model.classes_],
+        "max_depth": int(depth),
+        "n_trees": len(model.estimators_),
+        "encoders": {col: [str(v) for v in le.classes_] for col, le in encoders.items()},
+    }
+
+    # Write next to the target and swap in, so a reader never sees a half-written model
+    tmp_dir = out_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_dir, name + ".npy"), arr)
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return out_dir
+
+
+def load_encoded_dataset(path="ayurvedic_dosha_dataset.csv"):
+    """Reads the questionnaire data and label-encodes every column. Returns (X, y, encoders)."""
+    df = pd.read_csv(path)
+
+    # Advanced Encoding (Saving encoders to handle user input later)
     encoders = {}
     for col in df.columns:
         # We use LabelEncoder, but in a real complex app, 
@@ -23,23 +114,319 @@ def train_and_save_complex_model():
         df[col] = le.fit_transform(df[col])
         encoders[col] = le
 
-    # 3. Split Features and Target
-    X = df.drop('dosha', axis=1)
-    y = df['dosha']
+    return df.drop('dosha', axis=1), df['dosha'], encoders
+
+
+def split_holdout(X, y, seed=42):
+    """Stratified train / holdout split. Returns (X_train, y_train, X_holdout, y_holdout)."""
+    X_train, X_holdout, y_train, y_holdout = train_test_split(
+        X, y, test_size=HOLDOUT_FRACTION, stratify=y, random_state=seed)
+    return X_train, y_train, X_holdout, y_holdout
+
+
+def decode_rows(X, y, encoders):
+    """Encoded rows back to questionnaire answers, the form the registry scores a holdout in."""
+    df = pd.DataFrame({col: encoders[col].inverse_transform(X[col]) for col in X.columns})
+    df['dosha'] = encoders['dosha'].inverse_transform(np.asarray(y))
+    return df
 
-    # 4. Train a robust Random Forest
+
+def save_model(model, encoders, holdout=None):
+    """
+    Saves the "Brain" (Model) and "Dictionary" (Encoders), plus the compiled
+    arrays for forests and the holdout rows (a DataFrame of answers + dosha the
+    model never trained on), and publishes them as a new model registry version.
+    """
+    joblib.dump(model, 'dietveda_complex_model.pkl')
+    joblib.dump(encoders, 'dietveda_encoders.pkl')
+    if holdout is not None:
+        holdout.to_csv(HOLDOUT_FILE, index=False)
+    elif os.path.exists(HOLDOUT_FILE):
+        os.remove(HOLDOUT_FILE)  # a previous run's split says nothing about this model
+    if isinstance(model, RandomForestClassifier):
+        export_compiled_model(model, encoders)
+    else:
+        # Only forests can be flattened; don't leave a previous forest's arrays behind
+        shutil.rmtree(COMPILED_MODEL_DIR, ignore_errors=True)
+
+    # Publish an immutable, checksummed copy; a running server picks it up on activation
+    version = publish_model(notes=f"{type(model).__name__}, {getattr(model, 'n_estimators', '?')} estimators")
+    print(f"📦 Published model {version} (go live: python model_registry.py activate {version})")
+    return version
+
+
+def train_and_save_complex_model():
+    print("⚙️  Initializing Training Sequence...")
+    
+    # 1. Load Data
+    try:
+        X, y, encoders = load_encoded_dataset()
+    except FileNotFoundError:
+        print("❌ Error: Dataset not found!")
+        return
+
+    # 2. Keep a stratified holdout out of training (the registry validates on it)
+    X_train, y_train, X_holdout, y_holdout = split_holdout(X, y)
+
+    # 3. Train a robust Random Forest
     # n_estimators=200 increases complexity/stability
     # min_samples_split prevents overfitting on tiny details
     model = RandomForestClassifier(n_estimators=200, min_samples_split=5, random_state=42)
-    model.fit(X, y)
+    model.fit(X_train, y_train)
 
-    # 5. Save the "Brain" (Model) and "Dictionary" (Encoders)
-    joblib.dump(model, 'dietveda_complex_model.pkl')
-    joblib.dump(encoders, 'dietveda_encoders.pkl')
+    # 4. Save the "Brain" (Model) and "Dictionary" (Encoders)
+    save_model(model, encoders, holdout=decode_rows(X_holdout, y_holdout, encoders))
     
     print("✅ Model trained successfully.")
+    print(f"✅ Holdout accuracy: {model.score(X_holdout, y_holdout):.3f} on {len(y_holdout)} unseen rows")
     print("✅ Model saved as 'dietveda_complex_model.pkl'")
+    print(f"✅ Compiled model exported to '{COMPILED_MODEL_DIR}/'")
     print("🔒 Technical details (Confusion Matrix) hidden from user interface.")
 
+
+# ---------------------------------------------------------
+# MODEL SEARCH (--search)
+# ---------------------------------------------------------
+def search_candidates(seed):
+    """Every (estimator, params) combination of SEARCH_SPACE, seeded for reproducibility."""
+    candidates = []
+    for estimator, grid in SEARCH_SPACE:
+        keys = list(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            params = dict(zip(keys, values), random_state=seed)
+            candidates.append(clone(estimator).set_params(**params))
+    return candidates
+
+
+def _grid_keys(model):
+    for estimator, grid in SEARCH_SPACE:
+        if type(model) is type(estimator):
+            return grid
+    return {}
+
+
+def _cross_validate(task):
+    """Worker: k-fold CV accuracy of one candidate, then a refit on all data."""
+    model, X, y, folds, seed = task
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    start = time.perf_counter()
+    scores = cross_val_score(model, X, y, cv=cv, scoring="accuracy")
+    model.fit(X, y)
+    return model, scores, time.perf_counter() - start
+
+
+def _best_time(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _inference_cost(model, X):
+    """Tree nodes visited per profile (summed over all trees): a timer-free latency measure."""
+    trees = np.ravel(model.estimators_)
+    return sum(tree.decision_path(X.to_numpy(dtype=np.float32)).nnz for tree in trees) / len(X)
+
+
+def _measure_latency(model, X):
+    """Best-of-n predict_proba time (ms) for one profile and for a 1k-profile batch."""
+    one = X.iloc[[0]]
+    batch = X.sample(1000, replace=True, random_state=0)
+    model.predict_proba(one)  # warm-up
+    return _best_time(lambda: model.predict_proba(one), 50), _best_time(lambda: model.predict_proba(batch), 5)
+
+
+def search_and_save_best_model(workers=None, seed=42, folds=5, report_path=REPORT_FILE):
+    """
+    Cross-validates every SEARCH_SPACE candidate across a process pool, then
+    times the refit models one at a time (so latency isn't skewed by the
+    pool). The most accurate model wins; candidates within ACCURACY_TOLERANCE
+    of it count as ties and the one with the lowest inference cost (tree nodes
+    visited per profile) is saved. Wall-clock timings are reported too, but
+    selection only uses the deterministic numbers, so a fixed seed picks the
+    same model every run.
+    """
+    print("⚙️  Initializing Model Search...")
+    try:
+        X, y, encoders = load_encoded_dataset()
+    except FileNotFoundError:
+        print("❌ Error: Dataset not found!")
+        return
+
+    # The holdout takes no part in CV or refits; it only scores the winner
+    X, y, X_holdout, y_holdout = split_holdout(X, y, seed)
+    candidates = search_candidates(seed)
+    print(f"🔎 {len(candidates)} candidates, {folds}-fold CV, {workers or os.cpu_count()} workers")
+
+    # 1. Parallel cross-validation (results come back in candidate order)
+    start = time.perf_counter()
+    tasks = [(model, X, y, folds, seed) for model in candidates]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        fitted = list(pool.map(_cross_validate, tasks))
+    search_seconds = time.perf_counter() - start
+
+    # 2. Inference latency, measured serially
+    results = []
+    for model, scores, fit_seconds in fitted:
+        single_ms, batch_ms = _measure_latency(model, X)
+        results.append({
+            "model": type(model).__name__,
+            "params": {k: v for k, v in model.get_params().items() if k in _grid_keys(model) or k == "random_state"},
+            "cv_accuracy": float(scores.mean()),
+            "cv_std": float(scores.std()),
+            "fold_accuracy": [float(s) for s in scores],
+            "inference_cost": round(_inference_cost(model, X), 3),
+            "latency_ms": round(single_ms, 4),
+            "batch_1k_ms": round(batch_ms, 4),
+            "fit_seconds": round(fit_seconds, 4),
+        })
+
+    # 3. Selection: best accuracy, ties broken by inference cost, then candidate order
+    best_accuracy = max(r["cv_accuracy"] for r in results)
+    finalists = [i for i, r in enumerate(results) if r["cv_accuracy"] >= best_accuracy - ACCURACY_TOLERANCE]
+    winner = min(finalists, key=lambda i: (results[i]["inference_cost"], -results[i]["cv_accuracy"], i))
+
+    best = fitted[winner][0]
+    results[winner]["holdout_accuracy"] = float(best.score(X_holdout, y_holdout))
+    save_model(best, encoders, holdout=decode_rows(X_holdout, y_holdout, encoders))
+    with open(report_path, "w") as f:
+        json.dump({
+            "seed": seed,
+            "folds": folds,
+            "workers": workers or os.cpu_count(),
+            "search_seconds": round(search_seconds, 3),
+            "selection": f"max cv_accuracy (ties within {ACCURACY_TOLERANCE}), then min inference_cost",
+            "winner": results[winner],
+            "candidates": sorted(results, key=lambda r: -r["cv_accuracy"]),
+        }, f, indent=2)
+
+    print(f"✅ Winner: {results[winner]['model']} {results[winner]['params']}")
+    print(f"   CV accuracy {results[winner]['cv_accuracy']:.3f}, holdout {results[winner]['holdout_accuracy']:.3f}, "
+          f"{results[winner]['latency_ms']:.2f} ms/profile, "
+          f"{results[winner]['batch_1k_ms']:.2f} ms per 1k batch")
+    print(f"✅ Model saved as 'dietveda_complex_model.pkl', report in '{report_path}'")
+
+
+# ---------------------------------------------------------
+# OUT-OF-CORE TRAINING (--stream)
+# ---------------------------------------------------------
+def scan_vocabularies(path, chunksize=500_000):
+    """
+    Pass 1: every distinct value of every column, read chunk by chunk.
+    Returns ({column: sorted values}, row count); sorted like LabelEncoder.classes_.
+    """
+    seen, n_rows = {}, 0
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        for col in chunk.columns:
+            seen.setdefault(col, set()).update(chunk[col].dropna().unique())
+        n_rows += len(chunk)
+    return {col: sorted(values) for col, values in seen.items()}, n_rows
+
+
+def fixed_encoders(vocabularies):
+    """LabelEncoders with a preset vocabulary (what fit() would learn on the full file)."""
+    encoders = {}
+    for col, values in vocabularies.items():
+        le = LabelEncoder()
+        le.classes_ = np.array(values, dtype=object)
+        encoders[col] = le
+    return encoders
+
+
+def _fit_chunk_forest(task):
+    """Worker: a small forest on one chunk's subsample."""
+    X, y, feature_names, n_trees, seed = task
+    model = RandomForestClassifier(n_estimators=n_trees, min_samples_split=5, random_state=seed)
+    model.fit(pd.DataFrame(X, columns=feature_names), y)
+    return model
+
+
+def train_streaming_model(path, chunksize=500_000, workers=None, n_trees=200,
+                          sample_rows=20_000, holdout_rows=20_000, seed=42):
+    """
+    Trains on questionnaire files far larger than memory. Pass 1 collects
+    fixed vocabularies; pass 2 re-reads the file in chunks, encodes each with
+    those vocabularies, and fits a few trees per chunk on a subsample in a
+    worker process. A random HOLDOUT_FRACTION of every chunk is kept out of
+    training (up to `holdout_rows` in total are saved for the registry's
+    validation). The trees are merged into one forest, so the saved artifacts
+    are the same kind DietVedaAI already loads. Only a bounded number of
+    chunks are in flight at any time.
+    """
+    print("⚙️  Initializing Streaming Training...")
+    try:
+        vocabularies, n_rows = scan_vocabularies(path, chunksize)
+    except FileNotFoundError:
+        print("❌ Error: Dataset not found!")
+        return
+    encoders = fixed_encoders(vocabularies)
+    features = [col for col in vocabularies if col != 'dosha']
+    n_classes = len(vocabularies['dosha'])
+
+    n_chunks = -(-n_rows // chunksize)
+    trees_per_chunk = max(1, -(-n_trees // n_chunks))
+    print(f"🔎 {n_rows:,} rows in {n_chunks} chunks, {trees_per_chunk} trees per chunk")
+
+    rng = np.random.default_rng(seed)
+    holdout_per_chunk = -(-holdout_rows // n_chunks)
+    forests, pending, holdout = [], deque(), []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        reader = pd.read_csv(path, dtype=str, chunksize=chunksize)
+        for i, chunk in enumerate(reader):
+            # 1. Encode with the fixed vocabularies (vectorized)
+            codes = {col: pd.Categorical(chunk[col], categories=vocabularies[col]).codes
+                     for col in vocabularies}
+            keep = np.all([c >= 0 for c in codes.values()], axis=0)  # drop rows with blanks
+
+            # 2. Set the holdout rows aside, subsample the rest and hand off to a worker
+            rows = np.flatnonzero(keep)
+            held = rng.random(len(rows)) < HOLDOUT_FRACTION
+            holdout.append(chunk.iloc[rows[held][:holdout_per_chunk]])
+            rows = rows[~held]
+            if len(rows) > sample_rows:
+                rows = np.sort(rng.choice(rows, sample_rows, replace=False))
+            X = np.stack([codes[f][rows] for f in features], axis=1)
+            y = codes['dosha'][rows]
+            pending.append(pool.submit(_fit_chunk_forest, (X, y, features, trees_per_chunk, seed + i)))
+
+            # 3. Bound memory: at most two chunks per worker in flight
+            while len(pending) > 2 * (workers or os.cpu_count()):
+                forests.append(pending.popleft().result())
+        forests.extend(f.result() for f in pending)
+
+    # 4. Merge: trees that saw every class vote together
+    complete = [f for f in forests if len(f.classes_) == n_classes]
+    if not complete:
+        print("❌ Error: No chunk contained every dosha class!")
+        return
+    if len(complete) < len(forests):
+        print(f"⚠️  Skipped {len(forests) - len(complete)} chunk(s) missing a dosha class")
+    model = complete[0]
+    model.estimators_ = [tree for f in complete for tree in f.estimators_]
+    model.n_estimators = len(model.estimators_)
+
+    save_model(model, encoders, holdout=pd.concat(holdout, ignore_index=True))
+    print(f"✅ Model trained on {n_rows:,} rows ({model.n_estimators} trees).")
+    print("✅ Model saved as 'dietveda_complex_model.pkl'")
+    return model
+
+
 if __name__ == "__main__":
-    train_and_save_complex_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the DietVeda dosha model.")
+    parser.add_argument("--search", action="store_true", help="cross-validated search over forest / boosting configs")
+    parser.add_argument("--stream", metavar="CSV", help="train chunk by chunk on a large questionnaire file")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="rows per chunk for --stream")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --search / --stream (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for models and CV splits")
+    parser.add_argument("--folds", type=int, default=5, help="CV folds for --search")
+    parser.add_argument("--report", default=REPORT_FILE, help="metrics report path for --search")
+    args = parser.parse_args()
+
+    if args.search:
+        search_and_save_best_model(workers=args.workers, seed=args.seed, folds=args.folds, report_path=args.report)
+    elif args.stream:
+        train_streaming_model(args.stream, chunksize=args.chunksize, workers=args.workers, seed=args.seed)
+    else:
+        train_and_save_complex_model()